@@ -3,7 +3,7 @@ import psycopg2
 import psycopg2.pool
 import logging
 from dotenv import load_dotenv
-from qdrant_client import QdrantClient
+from qdrant_client import QdrantClient, AsyncQdrantClient
 from threading import Lock
 from contextlib import contextmanager
 from typing import List, Dict, Any, Tuple, Optional
@@ -14,6 +14,17 @@ load_dotenv()
 _connection_pool = None
 _pool_lock = Lock()
 
+_qdrant_client = None
+_async_qdrant_client = None
+_qdrant_lock = Lock()
+
+# gRPC 채널 유휴 연결 유지 (요청 간 재연결/핸드셰이크 방지)
+QDRANT_GRPC_OPTIONS = {
+    "grpc.keepalive_time_ms": 10000,
+    "grpc.keepalive_timeout_ms": 5000,
+    "grpc.keepalive_permit_without_calls": 1,
+}
+
 def get_connection_pool():
     """
     싱글톤 패턴으로 PostgreSQL Connection Pool을 생성하고 반환합니다.
@@ -24,17 +35,19 @@ def get_connection_pool():
         with _pool_lock:
             if _connection_pool is None:
                 try:
+                    # 풀 크기는 동시 요청 수(검색/분석 스레드풀 포함)에 맞춰 환경 변수로 조정
                     _connection_pool = psycopg2.pool.ThreadedConnectionPool(
-                        minconn=5,
-                        maxconn=20,
+                        minconn=settings.DB_POOL_MIN,
+                        maxconn=settings.DB_POOL_MAX,
                         host=settings.DB_HOST,
                         database=settings.DB_NAME,
                         user=settings.DB_USER,
                         password=settings.DB_PASSWORD,
                         connect_timeout=5,
+                        application_name=settings.DB_APPLICATION_NAME,
                         options="-c statement_timeout=30000"
                     )
-                    logging.info("PostgreSQL Connection Pool 생성 완료 (min: 5, max: 20)")
+                    logging.info(f"PostgreSQL Connection Pool 생성 완료 (min: {settings.DB_POOL_MIN}, max: {settings.DB_POOL_MAX})")
                 except Exception as e:
                     logging.critical(f"Connection Pool 생성 실패: {e}")
                     _connection_pool = None
@@ -97,17 +110,105 @@ def close_connection_pool():
 
 
 def get_qdrant_client():
-    """Qdrant 클라이언트를 생성하고 반환합니다."""
-    try:
-        client = QdrantClient(
-            host=settings.QDRANT_HOST,
-            port=settings.QDRANT_PORT,
-            timeout=20.0
-        )
-        return client
-    except Exception as e:
-        logging.error(f"Qdrant 클라이언트 연결 실패: {e}")
-        return None
+    """
+    싱글톤 패턴으로 Qdrant 클라이언트를 생성하고 반환합니다.
+    QDRANT_PREFER_GRPC=true이면 gRPC(HTTP/2)를 우선 사용하여 동시 요청이 하나의 연결을 공유합니다.
+    (기본값은 HTTP: Qdrant 서버의 gRPC 포트(QDRANT_GRPC_PORT)를 개방한 환경에서만 켤 것)
+    """
+    global _qdrant_client
+
+    if _qdrant_client is None:
+        with _qdrant_lock:
+            if _qdrant_client is None:
+                try:
+                    _qdrant_client = QdrantClient(
+                        host=settings.QDRANT_HOST,
+                        port=settings.QDRANT_PORT,
+                        grpc_port=settings.QDRANT_GRPC_PORT,
+                        prefer_grpc=settings.QDRANT_PREFER_GRPC,
+                        grpc_options=QDRANT_GRPC_OPTIONS,
+                        timeout=20.0
+                    )
+                    logging.info(f"Qdrant 클라이언트 생성 완료 (gRPC: {settings.QDRANT_PREFER_GRPC})")
+                except Exception as e:
+                    logging.error(f"Qdrant 클라이언트 연결 실패: {e}")
+                    _qdrant_client = None
+
+    return _qdrant_client
+
+
+def get_async_qdrant_client():
+    """
+    이벤트 루프에서 직접 await 할 수 있는 비동기 Qdrant 클라이언트 싱글톤을 반환합니다.
+    (첫 호출은 FastAPI 이벤트 루프 안에서 이루어져야 합니다)
+    """
+    global _async_qdrant_client
+
+    if _async_qdrant_client is None:
+        with _qdrant_lock:
+            if _async_qdrant_client is None:
+                try:
+                    _async_qdrant_client = AsyncQdrantClient(
+                        host=settings.QDRANT_HOST,
+                        port=settings.QDRANT_PORT,
+                        grpc_port=settings.QDRANT_GRPC_PORT,
+                        prefer_grpc=settings.QDRANT_PREFER_GRPC,
+                        grpc_options=QDRANT_GRPC_OPTIONS,
+                        timeout=20.0
+                    )
+                    logging.info("비동기 Qdrant 클라이언트 생성 완료")
+                except Exception as e:
+                    logging.error(f"비동기 Qdrant 클라이언트 연결 실패: {e}")
+                    _async_qdrant_client = None
+
+    return _async_qdrant_client
+
+
+async def close_async_qdrant_client():
+    """애플리케이션 종료 시 비동기 Qdrant 클라이언트 연결을 닫습니다."""
+    global _async_qdrant_client
+
+    client = _async_qdrant_client
+    _async_qdrant_client = None
+    if client:
+        try:
+            await client.close()
+            logging.info("비동기 Qdrant 클라이언트가 종료되었습니다.")
+        except Exception as e:
+            logging.warning(f"비동기 Qdrant 클라이언트 종료 실패: {e}")
+
+
+def close_qdrant_client():
+    """애플리케이션 종료 시 Qdrant 클라이언트 연결을 닫습니다."""
+    global _qdrant_client
+
+    if _qdrant_client:
+        with _qdrant_lock:
+            if _qdrant_client:
+                try:
+                    _qdrant_client.close()
+                except Exception as e:
+                    logging.warning(f"Qdrant 클라이언트 종료 실패: {e}")
+                _qdrant_client = None
+                logging.info("Qdrant 클라이언트가 종료되었습니다.")
+
+
+def _reset_clients_after_fork():
+    """
+    fork된 자식 프로세스(멀티 워커)가 부모의 DB 소켓/gRPC 채널을 공유하지 않도록 싱글톤을 비웁니다.
+    (자식은 첫 요청 시 자신만의 연결 풀/클라이언트를 한 번 생성해 프로세스 전체에서 재사용)
+    """
+    global _connection_pool, _pool_lock, _qdrant_client, _async_qdrant_client, _qdrant_lock
+
+    _connection_pool = None
+    _qdrant_client = None
+    _async_qdrant_client = None
+    _pool_lock = Lock()
+    _qdrant_lock = Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_clients_after_fork)
 
 
 def log_search_query(query: str, results_count: int, user_uid: int = None):
@@ -177,43 +278,4 @@ def cleanup_db():
     """애플리케이션 종료 시 Connection Pool을 정리합니다."""
     logging.info("DB 리소스 정리 중...")
     close_connection_pool()
-
-def get_panels_data_from_db(panel_id_list: List[str]) -> List[Dict]:
-    """
-    panel_id 리스트로부터 패널 데이터 조회 (Connection Pool 사용)
-    """
-    if not panel_id_list:
-        return []
-    
-    panels_data = []
-    try:
-        with get_db_connection_context() as conn:
-            if not conn:
-                return []
-            cur = conn.cursor()
-
-            cur.execute(
-                """
-                WITH id_order (panel_id, ordering) AS (
-                    SELECT * FROM unnest(%s::text[], %s::int[])
-                )
-                SELECT t.panel_id, t.structured_data
-                FROM welcome_meta2 t
-                JOIN id_order o ON t.panel_id = o.panel_id
-                ORDER BY o.ordering;
-                """,
-                (panel_id_list, list(range(len(panel_id_list))))
-            )
-            rows = cur.fetchall()
-            
-            for panel_id, structured_data in rows:
-                if isinstance(structured_data, dict):
-                    panel = {'panel_id': panel_id}
-                    panel.update(structured_data)
-                    panels_data.append(panel)
-            
-            cur.close()
-        return panels_data
-    except Exception as e:
-        logging.error(f"패널 데이터 조회 실패: {e}", exc_info=True)
-        return []
\ No newline at end of file
+    close_qdrant_client()
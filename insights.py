@@ -1,9 +1,12 @@
 import os
 import logging
 import re 
+import heapq
 import pandas as pd
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 from collections import Counter, defaultdict
+from operator import itemgetter
+from functools import lru_cache
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import numpy as np
 from sklearn.cluster import DBSCAN
@@ -13,7 +16,7 @@ from llm import generate_stats_summary, generate_demographic_summary
 
 # --- Repository & Helpers ---
 from repository import PanelRepository, VectorRepository 
-from search_helpers import initialize_embeddings 
+from search_helpers import embed_texts
 from utils import (
     calculate_distribution,
     find_top_category,
@@ -25,48 +28,69 @@ from utils import (
 from mapping_rules import (
     get_field_mapping, 
     QPOLL_FIELD_TO_TEXT, 
-    QPOLL_ANSWER_TEMPLATES, 
-    VALUE_TRANSLATION_MAP, 
+    QPOLL_ANSWER_TEMPLATES,
+    QPOLL_ANSWER_PATTERNS,
+    QPOLL_CORE_VALUE_PATTERNS,
+    VALUE_TRANSLATION_MAP,
     find_target_columns_dynamic,
     FIELD_NAME_MAP,
     FIELD_ALIAS_MAP
 )
 from semantic_router import router 
 
+# 타겟 필드가 검색 조건과 겹쳐 100% 차트가 되는 것을 막기 위한 대체 분석 필드 (필드 -> 대체 필드)
+TARGET_FIELD_SUBSTITUTES = {
+    'job_duty_raw': 'job_title_raw',
+    'region_major': 'region_minor',
+    'income_personal_monthly': 'happiest_self_spending',
+    'income_household_monthly': 'happiest_self_spending',
+    'car_ownership': 'car_model_raw',
+    'phone_brand_raw': 'phone_model_raw',
+    'marital_status': 'children_count',
+}
+
+# 요약 통계용 기본 인구통계 필드 (질문에서 컬럼을 찾지 못했을 때)
+SUMMARY_DEFAULT_FIELDS = ['gender', 'birth_year', 'region_major']
+# 검색 결과 개요 요약에서 읽는 필드 (타겟 필드는 요청마다 추가)
+OVERVIEW_FIELDS = ('gender', 'region_major', 'birth_year', 'income_personal_monthly')
+
+# 라벨에서 제거할 괄호 부연 설명 "(...)"
+PARENTHESIZED_RE = re.compile(r'\([^)]*\)')
+
 def _clean_label(text: Any, max_length: int = 25) -> str:
     """라벨 정제 함수"""
     if not text: return ""
-    text_str = str(text)
-    cleaned = re.sub(r'\([^)]*\)', '', text_str).strip()
+    return _clean_label_text(str(text), max_length)
+
+@lru_cache(maxsize=8192)
+def _clean_label_text(text_str: str, max_length: int) -> str:
+    """정제 라벨 캐시: 패널 수만큼 반복되는 같은 응답 값은 최초 1회만 정제"""
+    cleaned = PARENTHESIZED_RE.sub('', text_str).strip()
     cleaned = " ".join(cleaned.split())
     if len(cleaned) > max_length:
         return cleaned[:max_length] + ".."
     return cleaned
 
+def _iter_cleaned_values(value: Any):
+    """단일 값/리스트 값을 펼쳐 비어 있지 않은 정제 라벨만 순서대로 반환"""
+    for v in (value if isinstance(value, list) else (value,)):
+        cleaned = _clean_label(v)
+        if cleaned: yield cleaned
+
 def _extract_core_value(field_name: str, sentence: str) -> str:
     """문장형 데이터에서 핵심 답변만 추출"""
     if not sentence: return ""
     
-    if field_name == "ott_count":
-        match = re.search(r'(\d+개|이용 안 함|없음)', sentence)
-        if match: return match.group(1)
-    elif field_name == "skincare_spending":
-        match = re.search(r'(\d+만\s*원|\d+~\d+만\s*원|\d+원)', sentence)
+    core_pattern = QPOLL_CORE_VALUE_PATTERNS.get(field_name)
+    if core_pattern:
+        match = core_pattern.search(sentence)
         if match: return match.group(1)
     
-    template = QPOLL_ANSWER_TEMPLATES.get(field_name)
-    if template:
-        try:
-            pattern_str = re.escape(template)
-            pattern_str = pattern_str.replace(re.escape("{answer_str}"), r"(.*?)")
-            pattern_str = pattern_str.replace(r"\(이\)다", r"(?:이)?다")
-            pattern_str = pattern_str.replace(r"\(으\)로", r"(?:으)?로")
-            pattern_str = pattern_str.replace(r"\(가\)", r"(?:가)?")
-            pattern_str = pattern_str.replace(r"\ ", r"\s*")
-            match = re.search(pattern_str, sentence)
-            if match:
-                return _clean_label(match.group(1))
-        except: pass
+    pattern = QPOLL_ANSWER_PATTERNS.get(field_name)
+    if pattern:
+        match = pattern.search(sentence)
+        if match:
+            return _clean_label(match.group(1))
 
     return _clean_label(sentence)
 
@@ -74,11 +98,11 @@ def _limit_distribution_top_k(distribution: Dict[str, float], k: int = 10) -> Di
     """[막대 차트용] 상위 K개만 남기고 나머지는 '기타'로 합칩니다."""
     if not distribution or len(distribution) <= k:
         return distribution
-    sorted_items = sorted(distribution.items(), key=lambda x: x[1], reverse=True)
-    top_items = dict(sorted_items[:k])
-    other_sum = sum(v for _, v in sorted_items[k:])
+    # 전체 정렬 대신 상위 K개만 힙으로 선택, 나머지는 총합에서 차감
+    top_items = dict(heapq.nlargest(k, distribution.items(), key=itemgetter(1)))
+    other_sum = round(sum(distribution.values()) - sum(top_items.values()), 1)
     if other_sum > 0:
-        top_items['기타'] = round(other_sum, 1)
+        top_items['기타'] = other_sum
     return top_items
 
 def _sort_distribution(distribution: Dict[str, float]) -> Dict[str, float]:
@@ -91,20 +115,26 @@ def get_field_distribution_from_db(field_name: str, limit: int = 50) -> Dict[str
     
     if field_name == "birth_year":
         query = f"""
-            WITH age_groups AS (
+            WITH birth_years AS (
+                -- 행마다 JSONB 추출/캐스팅을 반복하지 않도록 출생연도(int 표현식 인덱스와 같은 식)별로 먼저 집계
+                SELECT (structured_data->>'birth_year')::int AS birth_year, COUNT(*) AS cnt
+                FROM welcome_meta2
+                WHERE structured_data->>'birth_year' IS NOT NULL
+                GROUP BY 1
+            ), age_groups AS (
                 SELECT 
                     CASE 
-                        WHEN (date_part('year', CURRENT_DATE) - (structured_data->>'birth_year')::int) < 20 THEN '10대'
-                        WHEN (date_part('year', CURRENT_DATE) - (structured_data->>'birth_year')::int) < 30 THEN '20대'
-                        WHEN (date_part('year', CURRENT_DATE) - (structured_data->>'birth_year')::int) < 40 THEN '30대'
-                        WHEN (date_part('year', CURRENT_DATE) - (structured_data->>'birth_year')::int) < 50 THEN '40대'
-                        WHEN (date_part('year', CURRENT_DATE) - (structured_data->>'birth_year')::int) < 60 THEN '50대'
+                        WHEN age < 20 THEN '10대'
+                        WHEN age < 30 THEN '20대'
+                        WHEN age < 40 THEN '30대'
+                        WHEN age < 50 THEN '40대'
+                        WHEN age < 60 THEN '50대'
                         ELSE '60대 이상'
-                    END as age_group
-                FROM welcome_meta2
-                WHERE structured_data->>'birth_year' IS NOT NULL
+                    END as age_group,
+                    cnt
+                FROM (SELECT date_part('year', CURRENT_DATE) - birth_year AS age, cnt FROM birth_years) y
             )
-            SELECT age_group, COUNT(*), ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER (), 1)
+            SELECT age_group, SUM(cnt), ROUND(SUM(cnt) * 100.0 / SUM(SUM(cnt)) OVER (), 1)
             FROM age_groups GROUP BY age_group ORDER BY 3 DESC LIMIT {limit}
         """
     elif field_name == "children_count":
@@ -280,17 +310,18 @@ async def get_ai_summary(panel_ids: List[str], question: str):
     4. LLM 요약 생성
     """
     target_ids = panel_ids[:1000]
+    target_columns = find_target_columns_dynamic(question)
     
-    panels_data = PanelRepository.fetch_panels_data(target_ids)
+    # 통계에 쓰는 컬럼만 서버에서 추려 조회
+    panels_data = PanelRepository.fetch_panels_data(target_ids, fields=target_columns or SUMMARY_DEFAULT_FIELDS)
     
     if not panels_data:
         return {"summary": "분석할 데이터가 없습니다.", "used_fields": []}
 
     df = pd.DataFrame(panels_data)
-    target_columns = find_target_columns_dynamic(question)
     
     if not target_columns:
-        stats_context = calculate_column_stats(df, ['gender', 'birth_year', 'region_major'])
+        stats_context = calculate_column_stats(df, SUMMARY_DEFAULT_FIELDS)
         target_columns = ['기본 인구통계']
     else:
         stats_context = calculate_column_stats(df, target_columns)
@@ -302,16 +333,21 @@ async def get_ai_summary(panel_ids: List[str], question: str):
         "used_fields": target_columns
     }
 
-async def get_search_result_overview(query: str, panel_ids: List[str], classification: Dict) -> str:
+def get_search_result_overview(query: str, panel_ids: List[str], classification: Dict) -> str:
     """
     Lite 모드 검색 결과에 대한 텍스트 요약을 생성합니다.
+    DB 조회와 LLM 호출이 모두 블로킹이므로 비동기 경로에서는 asyncio.to_thread로 호출
     """
     if not panel_ids:
         return "검색된 패널이 없습니다."
 
     sample_ids = panel_ids[:1000]
     
-    panels_data = PanelRepository.fetch_panels_data(sample_ids)
+    # 요약에 쓰는 필드(타겟 + 인구통계 + 소득)만 서버에서 추려 조회
+    overview_fields = list(OVERVIEW_FIELDS)
+    target_field = classification.get('target_field')
+    if target_field: overview_fields.append(target_field)
+    panels_data = PanelRepository.fetch_panels_data(sample_ids, fields=overview_fields)
     
     if not panels_data:
         return "데이터를 불러올 수 없습니다."
@@ -321,7 +357,6 @@ async def get_search_result_overview(query: str, panel_ids: List[str], classific
     stats_context = [] 
     
     # 1. 타겟 필드 통계
-    target_field = classification.get('target_field')
     if target_field and target_field in df.columns:
         counts = df[target_field].value_counts(normalize=True).head(3)
         if not counts.empty:
@@ -376,50 +411,31 @@ def create_crosstab_chart(
     """교차 분석 차트 생성"""
     logging.info(f"       → 교차 분석: '{field1}' vs '{field2}'")
     
-    all_values_field2 = []
+    # field2 값은 한 번만 펼치고 정제하여 전체 빈도 집계와 그룹별 분류에 함께 사용
+    cleaned_rows = []
+    global_counter = Counter()
     for item in panels_data:
         val2 = item.get(field2)
-        if not val2: continue
-        
-        if isinstance(val2, list):
-            for v in val2:
-                cleaned = _clean_label(v)
-                if cleaned: all_values_field2.append(cleaned)
-        else:
-            cleaned = _clean_label(val2)
-            if cleaned: all_values_field2.append(cleaned)
+        if val2 is None: continue
+        cleaned_values = list(_iter_cleaned_values(val2))
+        global_counter.update(cleaned_values)
+        cleaned_rows.append((item.get(field1), cleaned_values))
             
-    if not all_values_field2:
+    if not global_counter:
         return {}
 
-    global_counter = Counter(all_values_field2)
-    top_7_keys = [k for k, v in global_counter.most_common(7)]
-    top_7_set = set(top_7_keys)
+    top_7_set = {k for k, v in global_counter.most_common(7)}
 
     crosstab_data = {} 
 
-    for item in panels_data:
-        val1 = item.get(field1)
-        val2 = item.get(field2)
-        
-        if val1 is None or val2 is None: continue
+    for val1, cleaned_values in cleaned_rows:
+        if val1 is None: continue
 
         raw_key1 = get_age_group(val1) if field1 == 'birth_year' else str(val1)
         key1 = _clean_label(raw_key1)
         
-        if key1 not in crosstab_data:
-            crosstab_data[key1] = []
-            
-        values_to_process = val2 if isinstance(val2, list) else [val2]
-        
-        for v in values_to_process:
-            cleaned_v = _clean_label(v)
-            if not cleaned_v: continue
-            
-            if cleaned_v in top_7_set:
-                crosstab_data[key1].append(cleaned_v)
-            else:
-                crosstab_data[key1].append("기타")
+        group_values = crosstab_data.setdefault(key1, [])
+        group_values.extend(v if v in top_7_set else "기타" for v in cleaned_values)
 
     if not crosstab_data:
         return {}
@@ -440,8 +456,8 @@ def create_crosstab_chart(
 
     # Bar Chart
     chart_values = {}
-    sorted_groups = sorted(crosstab_data.keys(), key=lambda k: len(crosstab_data[k]), reverse=True)
-    target_groups = sorted_groups[:max_categories]
+    # 상위 max_categories개 그룹만 필요하므로 전체 정렬 대신 부분 선택 (O(N log k))
+    target_groups = heapq.nlargest(max_categories, crosstab_data, key=lambda k: len(crosstab_data[k]))
 
     for group in target_groups:
         items = crosstab_data[group]
@@ -468,13 +484,8 @@ def _analyze_fields_in_parallel(panels_data: List[Dict], candidate_fields: List[
 
             if fname == "birth_year":
                 field_values[fname].append(get_age_group(val))
-            elif isinstance(val, list):
-                for v in val:
-                    cleaned = _clean_label(v)
-                    if cleaned: field_values[fname].append(cleaned)
             else:
-                cleaned = _clean_label(val)
-                if cleaned: field_values[fname].append(cleaned)
+                field_values[fname].extend(_iter_cleaned_values(val))
 
     results = []
     for fname, vals in field_values.items():
@@ -525,14 +536,54 @@ def find_high_ratio_fields_optimized(
                 "top_ratio": top_ratio
             })
     
-    high_ratio_results.sort(key=lambda x: x["top_ratio"], reverse=True)
-    return high_ratio_results[:max_charts]
+    return heapq.nlargest(max_charts, high_ratio_results, key=itemgetter("top_ratio"))
+
+def _collect_fixed_filters(classified_keywords: dict) -> set:
+    """단일 값으로 고정된 필터 필드 집합 (분포가 100%로 나오는 필드)"""
+    fixed_filters = set()
+
+    # 1. Demographic Filters 확인
+    demographic_filters = classified_keywords.get('demographic_filters', {})
+    if demographic_filters:
+        for k, v in demographic_filters.items():
+            if not isinstance(v, list) or len(v) == 1:
+                fixed_filters.add(k)
+                mapped_field = FIELD_ALIAS_MAP.get(k)
+                if mapped_field: fixed_filters.add(mapped_field)
+
+    # 2. Structured Filters 확인
+    structured_filters = classified_keywords.get('structured_filters', [])
+    for f in structured_filters:
+        if f.get('operator') in ['eq', 'like', 'ilike']:
+             if f.get('field'): fixed_filters.add(f['field'])
+    return fixed_filters
+
+def resolve_target_field(classified_keywords: dict, fixed_filters: set = None) -> Optional[str]:
+    """분석/테이블에 사용할 최종 target_field를 계산합니다. (classified_keywords는 변경하지 않음)"""
+    target_field = classified_keywords.get('target_field')
+    if not target_field:
+        return target_field
+    if fixed_filters is None:
+        fixed_filters = _collect_fixed_filters(classified_keywords)
+
+    substitute = TARGET_FIELD_SUBSTITUTES.get(target_field)
+    if substitute:
+        logging.info(f"   🔄 대체 필드 적용: {target_field} -> {substitute}")
+        return substitute
+    if target_field in fixed_filters:
+        logging.info(f"   🚫 '{target_field}'에 대한 대체 필드 없음 -> 타겟 해제하여 100% 차트 방지")
+        return None
+    return target_field
 
 def analyze_search_results_optimized(
     query: str,
     classified_keywords: dict,
     panel_id_list: List[str]
 ) -> Tuple[Dict, int]:
+    """
+    검색 결과 패널 분석 (차트 생성)
+    classified_keywords['target_field']는 호출 측에서 resolve_target_field로 확정한 값을 그대로 사용
+    """
     logging.info(f"📊 분석 시작 (최적화) - panel_id 수: {len(panel_id_list)}개")
     
     if not panel_id_list:
@@ -542,57 +593,9 @@ def analyze_search_results_optimized(
         panels_data = PanelRepository.fetch_panels_data(panel_id_list)
 
         if not panels_data: return {"main_summary": "데이터 없음", "charts": []}, 200
-        fixed_filters = set()
-        
-        # 1. Demographic Filters 확인
-        demographic_filters = classified_keywords.get('demographic_filters', {})
-        if demographic_filters:
-            for k, v in demographic_filters.items():
-                if not isinstance(v, list) or len(v) == 1:
-                    fixed_filters.add(k)
-                    mapped_field = FIELD_ALIAS_MAP.get(k)
-                    if mapped_field: fixed_filters.add(mapped_field)
-
-        # 2. Structured Filters 확인
-        structured_filters = classified_keywords.get('structured_filters', [])
-        for f in structured_filters:
-            if f.get('operator') in ['eq', 'like', 'ilike']: 
-                 if f.get('field'): fixed_filters.add(f['field'])
-    
+        fixed_filters = _collect_fixed_filters(classified_keywords)
         target_field = classified_keywords.get('target_field')
-        
-        if target_field:
-            if target_field == 'job_duty_raw':
-                logging.info(f"   🔄 대체 필드 적용: job_duty_raw -> job_title_raw")
-                target_field = 'job_title_raw'
-                classified_keywords['target_field'] = target_field
-            elif target_field == 'region_major':
-                logging.info(f"   🔄 대체 필드 적용: region_major -> region_minor")
-                target_field = 'region_minor'
-                classified_keywords['target_field'] = target_field
-            elif target_field in ['income_personal_monthly', 'income_household_monthly']:
-                logging.info(f"   🔄 대체 필드 적용: {target_field} -> happiest_self_spending")
-                target_field = 'happiest_self_spending' 
-                classified_keywords['target_field'] = target_field
-            elif target_field == 'car_ownership':
-                logging.info(f"   🔄 대체 필드 적용: car_ownership -> car_model_raw")
-                target_field = 'car_model_raw'
-                classified_keywords['target_field'] = target_field
-            elif target_field == 'phone_brand_raw':
-                logging.info(f"   🔄 대체 필드 적용: phone_brand_raw -> phone_model_raw")
-                target_field = 'phone_model_raw'
-                classified_keywords['target_field'] = target_field
-            elif target_field == 'marital_status':
-                logging.info(f"   🔄 대체 필드 적용: marital_status -> children_count")
-                target_field = 'children_count'
-                classified_keywords['target_field'] = target_field
-            else:
-                if target_field in fixed_filters:
-                    logging.info(f"   🚫 '{target_field}'에 대한 대체 필드 없음 -> 타겟 해제하여 100% 차트 방지")
-                    target_field = None 
-                    classified_keywords['target_field'] = None
 
-        
         raw_keywords = classified_keywords.get('ranked_keywords_raw', [])
         ranked_keywords = []
         search_used_fields = set()
@@ -712,7 +715,9 @@ def analyze_search_results_optimized(
         if is_single_household: used_fields.append('income_household_monthly')
 
         # 차량 소유 비율 70% 이상 시 차종 차트 추가
-        car_ownership_values = [p.get('car_ownership') for p in panels_data if p.get('car_ownership')]
+        # (두 필드가 이미 모두 사용 중이면 분포 결과가 버려지므로 전체 패널 순회 자체를 생략)
+        car_check_needed = 'car_model_raw' not in used_fields or 'car_ownership' not in used_fields
+        car_ownership_values = [p.get('car_ownership') for p in panels_data if p.get('car_ownership')] if car_check_needed else []
         if car_ownership_values:
             flat_values = []
             car_map = VALUE_TRANSLATION_MAP.get('car_ownership', {}) 
@@ -745,27 +750,29 @@ def analyze_search_results_optimized(
                 if 'car_ownership' not in used_fields:
                     used_fields.append("car_ownership")
 
-        with ThreadPoolExecutor(max_workers=len(chart_tasks) or 1) as executor:
-            futures = []
-            for task in chart_tasks:
-                kw = task['kw_info']
-                if task['type'] == 'filter':
-                    futures.append(executor.submit(create_chart_data_optimized, kw.get('keyword',''), kw.get('field'), kw.get('description'), panels_data))
-                else:
-                    futures.append(executor.submit(create_qpoll_chart_data, kw.get('field')))
+        # 차트 작업이 없으면 스레드풀 생성/종료 비용 없이 건너뜀
+        if chart_tasks:
+            with ThreadPoolExecutor(max_workers=len(chart_tasks)) as executor:
+                futures = []
+                for task in chart_tasks:
+                    kw = task['kw_info']
+                    if task['type'] == 'filter':
+                        futures.append(executor.submit(create_chart_data_optimized, kw.get('keyword',''), kw.get('field'), kw.get('description'), panels_data))
+                    else:
+                        futures.append(executor.submit(create_qpoll_chart_data, kw.get('field')))
                 
-                futures[-1].priority = kw.get('priority', 99)
+                    futures[-1].priority = kw.get('priority', 99)
             
-            temp_results = []
-            for future in as_completed(futures):
-                try:
-                    chart = future.result()
-                    if chart.get('chart_data'):
-                        temp_results.append((future.priority, chart))
-                except: pass
+                temp_results = []
+                for future in as_completed(futures):
+                    try:
+                        chart = future.result()
+                        if chart.get('chart_data'):
+                            temp_results.append((future.priority, chart))
+                    except: pass
             
-            temp_results.sort(key=lambda x: x[0])
-            charts.extend([res[1] for res in temp_results])
+                temp_results.sort(key=lambda x: x[0])
+                charts.extend([res[1] for res in temp_results])
 
         # 교차 분석
         if len(charts) < 5:
@@ -812,7 +819,7 @@ async def generate_dynamic_insight(panel_ids: List[str], target_field: str, fiel
     if not panel_ids or not target_field: return {}
     logging.info(f"📊 동적 인사이트 생성 중... (Field: {target_field})")
     
-    panels_data = PanelRepository.fetch_panels_data(panel_ids)
+    panels_data = PanelRepository.fetch_panels_data(panel_ids, fields=[target_field])
     
     cleaned_answers = []
     for p in panels_data:
@@ -850,13 +857,11 @@ async def generate_dynamic_insight(panel_ids: List[str], target_field: str, fiel
 
 def _group_answers_with_vectors(answers: List[str], threshold: float = 0.75) -> Dict[str, float]:
     if not answers: return {}
-    embeddings_model = initialize_embeddings()
     unique_answers = list(set(answers))
     if len(unique_answers) < 2: return calculate_distribution(answers)
 
     try:
-        vectors = embeddings_model.embed_documents(unique_answers)
-        vectors = np.array(vectors)
+        vectors = embed_texts(unique_answers)
         clustering = DBSCAN(eps=1-threshold, min_samples=1, metric='cosine').fit(vectors)
         labels = clustering.labels_
         
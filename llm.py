@@ -11,6 +11,11 @@ from settings import settings
 
 load_dotenv()
 
+# LLM 응답/쿼리 파싱용 정규식 (import 시 1회 컴파일)
+JSON_CODE_BLOCK_RE = re.compile(r'```(?:json)?\s*({.*?})\s*```', re.DOTALL)
+JSON_OBJECT_RE = re.compile(r'({.*})', re.DOTALL)
+LIMIT_COUNT_RE = re.compile(r'(\d+)\s*명')
+
 # 1. Claude 클라이언트 설정
 try:
     # API Key는 환경변수(.env)에서 자동으로 로드됩니다.
@@ -121,11 +126,11 @@ def parse_query_intelligent(query: str) -> Dict[str, Any]:
        logging.info(f"🤖 Claude LLM 원본 응답:\n---\n{text_output}\n---")
        
        # JSON 추출 (마크다운 코드 블록 제거)
-       json_match = re.search(r'```(?:json)?\s*({.*?})\s*```', text_output, re.DOTALL)
+       json_match = JSON_CODE_BLOCK_RE.search(text_output)
        if json_match:
            json_str = json_match.group(1)
        else:
-           json_match = re.search(r'({.*})', text_output, re.DOTALL)
+           json_match = JSON_OBJECT_RE.search(text_output)
            if json_match:
                json_str = json_match.group(1)
            else:
@@ -179,7 +184,7 @@ def parse_query_intelligent(query: str) -> Dict[str, Any]:
 
 def extract_limit_from_query(query: str) -> Optional[int]:
     """쿼리에서 인원 수 추출"""
-    all_limit_matches = re.findall(r'(\d+)\s*명', query)
+    all_limit_matches = LIMIT_COUNT_RE.findall(query)
     if all_limit_matches:
         try:
             return int(all_limit_matches[-1])
@@ -17,17 +17,18 @@ from services import (
     custom_key_builder, preload_models,
     _perform_common_search, _prepare_display_fields,
     _get_ordered_welcome_data, _get_qpoll_responses_for_table,
-    _get_welcome_data, _get_qpoll_data
+    _get_welcome_data, _get_qpoll_data, _build_table_rows
 )
 
 from insights import (
     get_ai_summary, 
     analyze_search_results_optimized as analyze_search_results,
-    get_search_result_overview
+    get_search_result_overview,
+    resolve_target_field
 )
 from llm import parse_query_intelligent
 from mapping_rules import QPOLL_FIELD_TO_TEXT
-from db import init_db, cleanup_db, get_db_connection_context
+from db import init_db, cleanup_db, get_db_connection_context, close_async_qdrant_client
 
 logging.basicConfig(
     level=logging.INFO,
@@ -65,6 +66,7 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logging.info("🧹 FastAPI 종료... Connection Pool 정리")
+    await close_async_qdrant_client()
     cleanup_db()
 
 # --- API Endpoints ---
@@ -110,33 +112,13 @@ async def search_panels(search_query: SearchQuery):
             _get_qpoll_responses_for_table(ids_to_fetch, qpoll_fields)
         )
         
-        table_data = []
-        target_field = classification.get('target_field') 
-
-        for welcome_row in welcome_table_data:
-            pid = welcome_row.get('panel_id')
-            if pid and pid in qpoll_responses_map:
-                welcome_row.update(qpoll_responses_map[pid])
-            
-            is_valid_row = True
-            if target_field in qpoll_fields:
-                val = welcome_row.get(target_field)
-                if not val or str(val).strip().lower() == 'nan': is_valid_row = False
-            elif target_field in welcome_fields:
-                val = welcome_row.get(target_field)
-                if not val or str(val).strip().lower() == 'nan': is_valid_row = False
-
-            for field in (welcome_fields + qpoll_fields):
-                if field != target_field:
-                    val = welcome_row.get(field)
-                    if not val or str(val).strip().lower() == 'nan': welcome_row[field] = "-"
-
-            if is_valid_row:
-                table_data.append(welcome_row)
-        
         user_limit = classification.get('limit', 100)
         final_limit = user_limit 
-        lite_response['tableData'] = table_data[:final_limit] 
+        table_data = _build_table_rows(
+            welcome_table_data, qpoll_responses_map, welcome_fields, qpoll_fields,
+            classification.get('target_field'), final_limit
+        )
+        lite_response['tableData'] = table_data 
         lite_response['display_fields'] = display_fields
         lite_response['mode'] = "lite" 
 
@@ -153,20 +135,9 @@ async def search_and_analyze(request: AnalysisRequest):
         pro_info, panel_ids, classification = await _perform_common_search(request.query, request.search_mode, mode="pro")
         user_limit = classification.get('limit', 100)
 
-        results = await asyncio.gather(
-            asyncio.to_thread(analyze_search_results, request.query, classification, panel_ids[:5000]),
-            get_search_result_overview(query=request.query, panel_ids=panel_ids, classification=classification)
-        )
+        # 분석이 사용할 최종 target_field(대체 필드/해제 반영)를 먼저 확정해야 테이블 컬럼과 차트가 일치함
+        classification = {**classification, 'target_field': resolve_target_field(classification)}
 
-        analysis_result_tuple = results[0] 
-        summary_text = results[1]          
-        
-        if isinstance(analysis_result_tuple, tuple):
-            analysis_result = analysis_result_tuple[0] 
-        else:
-            analysis_result = analysis_result_tuple
-
-        charts = analysis_result.get('charts', []) if analysis_result else []
         display_fields = _prepare_display_fields(classification, query_text=request.query)
         
         field_keys = [f['field'] for f in display_fields]
@@ -176,34 +147,29 @@ async def search_and_analyze(request: AnalysisRequest):
         fetch_limit = max(user_limit * 2, 500) 
         ids_to_fetch = panel_ids[:fetch_limit]
 
-        welcome_table_data, qpoll_responses_map = await asyncio.gather(
+        # 테이블 조회(PostgreSQL + Qdrant)는 검색 결과에만 의존하므로 분석/요약과 같은 gather에서 동시에 수행
+        results = await asyncio.gather(
+            asyncio.to_thread(analyze_search_results, request.query, classification, panel_ids[:5000]),
+            asyncio.to_thread(get_search_result_overview, request.query, panel_ids, classification),
             _get_ordered_welcome_data(ids_to_fetch, fields_to_fetch=welcome_fields),
             _get_qpoll_responses_for_table(ids_to_fetch, qpoll_fields)
         )
 
-        table_data = []
-        target_field = classification.get('target_field')
+        analysis_result_tuple = results[0] 
+        summary_text = results[1]          
+        welcome_table_data, qpoll_responses_map = results[2], results[3]
         
-        for welcome_row in welcome_table_data:
-            pid = welcome_row.get('panel_id')
-            if pid and pid in qpoll_responses_map:
-                welcome_row.update(qpoll_responses_map[pid])
-            
-            is_valid_row = True
-            if target_field in qpoll_fields:
-                val = welcome_row.get(target_field)
-                if not val or str(val).strip().lower() == 'nan': is_valid_row = False
-            elif target_field in welcome_fields:
-                val = welcome_row.get(target_field)
-                if not val or str(val).strip().lower() == 'nan': is_valid_row = False
-            
-            for field in (welcome_fields + qpoll_fields):
-                if field != target_field:
-                    val = welcome_row.get(field)
-                    if not val or str(val).strip().lower() == 'nan': welcome_row[field] = "-"
+        if isinstance(analysis_result_tuple, tuple):
+            analysis_result = analysis_result_tuple[0] 
+        else:
+            analysis_result = analysis_result_tuple
 
-            if is_valid_row:
-                table_data.append(welcome_row)
+        charts = analysis_result.get('charts', []) if analysis_result else []
+
+        table_data = _build_table_rows(
+            welcome_table_data, qpoll_responses_map, welcome_fields, qpoll_fields,
+            classification.get('target_field'), user_limit
+        )
         
         response_data = {
             "query": pro_info["query"],
@@ -211,7 +177,7 @@ async def search_and_analyze(request: AnalysisRequest):
             "display_fields": display_fields,
             "charts": charts,
             "search_summary": summary_text, 
-            "tableData": table_data[:user_limit], 
+            "tableData": table_data, 
             "total_count": len(panel_ids), 
             "mode": 'pro'
         }
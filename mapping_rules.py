@@ -1,6 +1,8 @@
 import re
 from typing import List, Dict, Union, Tuple, Optional, Any
 import logging
+import bisect
+import itertools
 from functools import lru_cache
 from llm import extract_relevant_columns_via_llm
 
@@ -284,6 +286,9 @@ QPOLL_FIELD_TO_TEXT = {
     "favorite_summer_water_spot": "여러분이 여름철 물놀이 장소로 가장 선호하는 곳은 어디입니까?",
 }
 
+# 질문 원문 -> 필드명 역매핑 (요청마다 재생성하지 않도록 모듈 로드 시 1회 구성)
+QPOLL_TEXT_TO_FIELD = {text: field for field, text in QPOLL_FIELD_TO_TEXT.items()}
+
 VECTOR_CATEGORY_TO_FIELD = {
     "DEMO_BASIC": ["gender", "birth_year", "region_major", "region_minor"],
     "FAMILY_STATUS": ["marital_status", "family_size", "children_count"],
@@ -560,6 +565,34 @@ QPOLL_ANSWER_TEMPLATES = {
     "favorite_summer_water_spot": "여름철 물놀이 장소로 가장 선호하는 곳은 {answer_str}이다.",
 }
 
+def _compile_answer_template(template: str) -> Optional[re.Pattern]:
+    """답변 템플릿을 핵심 답변 추출용 정규식으로 변환"""
+    try:
+        pattern_str = re.escape(template)
+        pattern_str = pattern_str.replace(re.escape("{answer_str}"), r"(.*?)")
+        pattern_str = pattern_str.replace(r"\(이\)다", r"(?:이)?다")
+        pattern_str = pattern_str.replace(r"\(으\)로", r"(?:으)?로")
+        pattern_str = pattern_str.replace(r"\(가\)", r"(?:가)?")
+        pattern_str = pattern_str.replace(r"\ ", r"\s*")
+        return re.compile(pattern_str)
+    except re.error:
+        return None
+
+# 템플릿은 정적이므로 import 시 1회만 정규식으로 컴파일
+QPOLL_ANSWER_PATTERNS: Dict[str, re.Pattern] = {
+    field: pattern
+    for field, pattern in (
+        (f, _compile_answer_template(t)) for f, t in QPOLL_ANSWER_TEMPLATES.items()
+    )
+    if pattern is not None
+}
+
+# 템플릿보다 먼저 적용하는 필드별 핵심 답변 추출 패턴 (개수/금액 표현)
+QPOLL_CORE_VALUE_PATTERNS: Dict[str, re.Pattern] = {
+    "ott_count": re.compile(r'(\d+개|이용 안 함|없음)'),
+    "skincare_spending": re.compile(r'(\d+만\s*원|\d+~\d+만\s*원|\d+원)'),
+}
+
 # 2. 동적 부정어 관리 로직 (Logic)
 COMMON_NEGATIVE_PATTERNS = [
     r"해\s*당\s*사\s*항\s*없\s*음",
@@ -608,23 +641,86 @@ def get_negative_patterns(field_name: str) -> List[str]:
         patterns.extend(SPECIFIC_NEGATIVE_PATTERNS[field_name])
     return patterns
 
-@lru_cache(maxsize=512)
-def get_field_mapping(keyword: str) -> Optional[Dict[str, Any]]:
-    search_keyword = keyword.lower().strip()
-    for pattern, mapping_info in KEYWORD_MAPPINGS:
-        result_info = mapping_info.copy()
+# 한 글자씩 \s*로만 이어진 패턴 (예: 경\s*험\s*없\s*음) -> 공백 제거 텍스트의 단순 부분 문자열과 동치
+_SPACED_LITERAL_RE = re.compile(r'^[^\\^$.*+?()\[\]{}|](?:\\s\*[^\\^$.*+?()\[\]{}|])*$')
+
+@lru_cache(maxsize=256)
+def get_negative_matchers(field_name: str) -> Tuple[Tuple[str, ...], Optional[re.Pattern]]:
+    """
+    필드별 부정 패턴을 (공백 제거 후 비교할 리터럴 목록, 나머지 패턴의 통합 정규식)으로 분리합니다.
+    리터럴은 정규식 없이 부분 문자열 검색으로 처리하고, 앵커/와일드카드가 있는 패턴만 정규식으로 검사합니다.
+    """
+    literals = []
+    regex_patterns = []
+    for pattern in get_negative_patterns(field_name):
+        if _SPACED_LITERAL_RE.match(pattern):
+            literals.append(pattern.replace(r'\s*', ''))
+        else:
+            regex_patterns.append(pattern)
+
+    regex = re.compile("|".join(f"(?:{p})" for p in regex_patterns)) if regex_patterns else None
+    return tuple(dict.fromkeys(literals)), regex
+
+# 문자열 패턴은 소문자로 미리 변환 (검사 순서는 KEYWORD_MAPPINGS 그대로 유지)
+_KEYWORD_MATCHERS: List[Tuple[Union[re.Pattern, str], Dict[str, str]]] = [
+    (pattern if isinstance(pattern, re.Pattern) else pattern.lower(), mapping_info)
+    for pattern, mapping_info in KEYWORD_MAPPINGS
+]
+
+def _scan_keyword_mappings(search_keyword: str) -> Optional[Dict[str, str]]:
+    """매핑 목록을 순서대로 검사하여 처음 매칭되는 매핑 정보를 반환"""
+    for pattern, mapping_info in _KEYWORD_MATCHERS:
         if isinstance(pattern, re.Pattern):
             if pattern.search(search_keyword):
-                return result_info
-        elif isinstance(pattern, str):
-            if pattern.lower() in search_keyword:
-                return result_info
+                return mapping_info
+        elif pattern in search_keyword:
+            return mapping_info
+    return None
+
+# 전체 패턴을 하나의 정규식으로 합친 사전 검사기: 어떤 패턴에도 걸리지 않는 키워드는 C 수준 스캔 1회로 바로 판정
+# (패턴별 대소문자 옵션은 인라인 플래그로 유지, 매칭되면 우선순위 판정을 위해 순서대로 재검사)
+_ANY_KEYWORD_RE = re.compile("|".join(
+    f"(?{'i' if pattern.flags & re.IGNORECASE else ''}:{pattern.pattern})"
+    if isinstance(pattern, re.Pattern) else re.escape(pattern)
+    for pattern, _ in _KEYWORD_MATCHERS
+))
+
+# 문자열 패턴과 정확히 같은 키워드는 해시 조회 1회로 결과를 얻도록 import 시 미리 판정해 둠
+# (앞선 정규식 패턴이 먼저 매칭되는 경우도 동일하게 반영)
+_EXACT_KEYWORD_DISPATCH: Dict[str, Dict[str, str]] = {
+    pattern: _scan_keyword_mappings(pattern)
+    for pattern, _ in _KEYWORD_MATCHERS if isinstance(pattern, str)
+}
+
+@lru_cache(maxsize=4096)
+def get_field_mapping(keyword: str) -> Optional[Dict[str, Any]]:
+    search_keyword = keyword.lower().strip()
+    mapping_info = _EXACT_KEYWORD_DISPATCH.get(search_keyword)
+    if mapping_info is None and _ANY_KEYWORD_RE.search(search_keyword):
+        mapping_info = _scan_keyword_mappings(search_keyword)
+    if mapping_info:
+        return mapping_info.copy()
     return {
         "field": "unknown", 
         "description": keyword, 
         "type": "unknown"
     }
 
+# 비즈니스 로직상 강제 연결이 필요한 경우만 최소한으로 정의
+IMPLICIT_RELATIONS = {
+    '여행': ['income_household_monthly'],
+    '차': ['car_model_raw', 'car_manufacturer_raw'],
+    '자동차': ['car_model_raw', 'car_manufacturer_raw'],
+    '자녀': ['children_count', 'family_size'],
+    '결혼': ['marital_status'],
+    '소득': ['job_title_raw', 'education_level']
+}
+# 모든 필드 설명을 구분자로 이어 붙인 검색 대상 문자열: 쿼리 단어 교대 패턴 한 번으로 필드 설명 전체를 훑음
+# (구분자는 쿼리 단어에 나올 수 없는 문자이므로 매칭이 설명 경계를 넘지 않음)
+_FIELD_DESC_KEYS = list(FIELD_NAME_MAP)
+_FIELD_DESC_TEXT = "\x00".join(FIELD_NAME_MAP.values())
+_FIELD_DESC_STARTS = list(itertools.accumulate((len(desc) + 1 for desc in FIELD_NAME_MAP.values()), initial=0))
+
 def find_related_fields(query: str) -> List[str]:
     """
     검색 쿼리에 포함된 단어를 기반으로, 연관된 필드(Q-Poll 등)를 동적으로 찾습니다.
@@ -633,56 +729,42 @@ def find_related_fields(query: str) -> List[str]:
     related_fields = set()
     
     # 1. 필드 설명(FIELD_NAME_MAP) 전체 스캔
-    for field_key, field_desc in FIELD_NAME_MAP.items():
-        # 필드 설명이 쿼리의 일부 단어를 포함하는지 확인 (간단한 키워드 매칭)
-        # 쿼리를 단어 단위로 쪼개서 확인
-        query_words = query.split()
-        for word in query_words:
-            if len(word) >= 2 and word in field_desc: # 2글자 이상만 매칭
-                related_fields.add(field_key)
-    
-    # 2. 비즈니스 로직상 강제 연결이 필요한 경우만 최소한으로 정의
-    IMPLICIT_RELATIONS = {
-        '여행': ['income_household_monthly'],
-        '차': ['car_model_raw', 'car_manufacturer_raw'],
-        '자동차': ['car_model_raw', 'car_manufacturer_raw'],
-        '자녀': ['children_count', 'family_size'],
-        '결혼': ['marital_status'],
-        '소득': ['job_title_raw', 'education_level']
-    }
+    # 쿼리는 한 번만 단어 단위로 쪼개고, 2글자 이상 단어만 중복 없이 확인
+    query_words = [word for word in dict.fromkeys(query.split()) if len(word) >= 2]
+    if query_words:
+        # 매칭된 설명의 필드를 기록하고 다음 설명 시작 위치부터 이어서 탐색 (필드당 최대 1회 매칭)
+        word_re = re.compile("|".join(map(re.escape, query_words)))
+        match = word_re.search(_FIELD_DESC_TEXT)
+        while match:
+            idx = bisect.bisect_right(_FIELD_DESC_STARTS, match.start()) - 1
+            related_fields.add(_FIELD_DESC_KEYS[idx])
+            match = word_re.search(_FIELD_DESC_TEXT, _FIELD_DESC_STARTS[idx + 1])
     
+    # 2. 강제 연결 키워드 매칭 (키워드 수가 적으므로 키워드별 포함 여부 확인, 접두어가 겹치는 키워드도 각각 매칭)
     for keyword, fields in IMPLICIT_RELATIONS.items():
         if keyword in query:
             related_fields.update(fields)
             
     return list(related_fields)
 
+# LLM 컬럼 선정용 메타데이터 (필드명: 한글설명), 기본 인구통계 + Q-Poll 질문 텍스트(중복 제외)
+_LLM_COLUMN_ITEMS = list(FIELD_NAME_MAP.items()) + [
+    (eng, text) for eng, text in QPOLL_FIELD_TO_TEXT.items() if eng not in FIELD_NAME_MAP
+]
+LLM_COLUMN_CATALOG = "".join(f"- {eng}: {desc}\n" for eng, desc in _LLM_COLUMN_ITEMS)
+LLM_VALID_COLUMNS = frozenset(eng for eng, _ in _LLM_COLUMN_ITEMS)
+
 def find_target_columns_dynamic(question: str) -> List[str]:
     """
     질문 의도를 파악해 분석할 타겟 컬럼들을 LLM을 통해 동적으로 선정합니다.
     """
-    # 1. LLM에게 제공할 컬럼 메타데이터 생성 (필드명: 한글설명)
-    # 속도 최적화를 위해 문자열로 미리 포맷팅
-    all_fields_str = ""
-    valid_columns = []
-    
-    # 기본 인구통계 + Q-Poll 필드 병합
-    for eng, kor in FIELD_NAME_MAP.items():
-        all_fields_str += f"- {eng}: {kor}\n"
-        valid_columns.append(eng)
-        
-    # Q-Poll 질문 텍스트도 매핑 정보로 활용
-    for eng, text in QPOLL_FIELD_TO_TEXT.items():
-        if eng not in FIELD_NAME_MAP: # 중복 제외
-            all_fields_str += f"- {eng}: {text}\n"
-            valid_columns.append(eng)
-
+    # 1. LLM에게 제공할 컬럼 메타데이터 (import 시 미리 포맷팅된 문자열 사용)
     # 2. LLM 호출
     logging.info(f"🔍 동적 컬럼 탐색 시작: '{question}'")
-    found_columns = extract_relevant_columns_via_llm(question, all_fields_str)
+    found_columns = extract_relevant_columns_via_llm(question, LLM_COLUMN_CATALOG)
     
     # 3. 유효성 검사 (실제 존재하는 컬럼만 필터링)
-    final_columns = [col for col in found_columns if col in valid_columns]
+    final_columns = [col for col in found_columns if col in LLM_VALID_COLUMNS]
     
     # 4. 보정 로직 (예: 질문에 '소득'이 있으면 관련 필드 강제 추가 등 - 필요시 작성)
     if '소득' in question and 'income_personal_monthly' not in final_columns:
@@ -1,32 +1,113 @@
 import logging
 import os
-from typing import List, Dict, Any, Optional, Tuple, Set
-from collections import Counter
+import re
+import hashlib
+import threading
+import weakref
+import psycopg2
+from typing import List, Dict, Any, Optional, Tuple, Union
+from collections import Counter, OrderedDict
 
 from qdrant_client.http.models import Filter, FieldCondition, MatchValue, MatchAny, MatchText
-from db import get_db_connection_context, get_qdrant_client
+from db import get_db_connection_context, get_qdrant_client, get_async_qdrant_client
 from mapping_rules import QPOLL_FIELD_TO_TEXT
 
+# 분석용 패널 데이터(JSONB) 조회 시 서버 측 커서에서 한 번에 가져올 행 수
+PANELS_DATA_FETCH_SIZE = 2000
+
+# 동적 WHERE 절의 psycopg2 자리표시자 (PREPARE 문에서는 $1, $2 ... 로 변환)
+_PLACEHOLDER_RE = re.compile(r"%s")
+
+# 연결(세션)별로 유지할 PREPARE 문 최대 개수 (초과 시 가장 오래 쓰지 않은 문장을 DEALLOCATE)
+PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("PREPARED_STATEMENT_CACHE_SIZE", "64"))
+
+
+class PanelQueryError(RuntimeError):
+    """PostgreSQL 조회 자체가 실패한 경우 (조건에 맞는 패널이 0명인 정상 결과와 구분하기 위함)"""
+
+
+class PreparedStatementCache:
+    """
+    연결(세션) 단위 PREPARE 문 캐시
+    연결 객체를 약한 참조 키로 사용하므로 풀에서 닫혀 사라진 연결의 기록은 자동으로 제거되고,
+    연결마다 최대 max_size개까지만 유지하며 가장 오래 쓰지 않은 문장은 DEALLOCATE함
+    """
+
+    def __init__(self, max_size: int = PREPARED_STATEMENT_CACHE_SIZE):
+        self.max_size = max_size
+        self._statements: "weakref.WeakKeyDictionary[Any, OrderedDict[str, None]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _for_connection(self, conn) -> "OrderedDict[str, None]":
+        with self._lock:
+            prepared = self._statements.get(conn)
+            if prepared is None:
+                prepared = self._statements[conn] = OrderedDict()
+            return prepared
+
+    def execute(self, conn, cur, statement_name: str, prepare_sql: str, execute_sql: str, params: tuple) -> None:
+        """필요하면 PREPARE 후 EXECUTE (풀에서 빌린 연결은 한 스레드만 쓰므로 연결별 기록에는 잠금 불필요)"""
+        prepared = self._for_connection(conn)
+        if statement_name in prepared:
+            prepared.move_to_end(statement_name)
+        else:
+            while len(prepared) >= self.max_size:
+                evicted, _ = prepared.popitem(last=False)
+                cur.execute(f"DEALLOCATE {evicted}")
+            cur.execute(prepare_sql)
+            prepared[statement_name] = None
+        try:
+            cur.execute(execute_sql, params)
+        except psycopg2.errors.InvalidSqlStatementName:
+            # 기록과 달리 세션에 문장이 없음 (서버 측 세션 초기화 등) -> PREPARE 후 재실행
+            conn.rollback()
+            cur.execute(prepare_sql)
+            cur.execute(execute_sql, params)
+
+    def _reset_after_fork(self) -> None:
+        # fork 시점에 다른 스레드가 잡고 있던 락은 자식에서 영원히 풀리지 않으므로 락까지 새로 만듦
+        self._lock = threading.Lock()
+        self._statements = weakref.WeakKeyDictionary()
+
+
+prepared_statement_cache = PreparedStatementCache()
+
+if hasattr(os, "register_at_fork"):
+    # 자식 프로세스는 부모의 연결(세션)을 쓰지 않으므로 PREPARE 기록을 비우고 시작
+    os.register_at_fork(after_in_child=prepared_statement_cache._reset_after_fork)
+
 # --- PostgreSQL Repository ---
 
 class PanelRepository:
     """PostgreSQL(welcome_meta2) 데이터 접근 담당"""
 
     @staticmethod
-    def fetch_panels_data(panel_ids: List[str]) -> List[Dict]:
-        """여러 패널의 전체 데이터 조회 (JSONB)"""
+    def fetch_panels_data(panel_ids: List[str], fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        여러 패널의 데이터 조회 (JSONB)
+        fields를 주면 서버에서 해당 키만 남겨 전송 (데이터가 비어 있는 패널 제외 기준은 전체 조회와 동일)
+        """
         if not panel_ids: return []
         try:
             with get_db_connection_context() as conn:
-                with conn.cursor() as cur:
+                # 서버 측(named) 커서로 JSONB를 itersize 단위로 나눠 받아 전체 결과를 한꺼번에 적재하지 않음
+                with conn.cursor(name="fetch_panels_data") as cur:
+                    cur.itersize = PANELS_DATA_FETCH_SIZE
+                    if fields:
+                        query = """
+                            SELECT CASE WHEN structured_data IS NULL OR structured_data = '{}'::jsonb THEN NULL
+                                ELSE COALESCE(
+                                    (SELECT jsonb_object_agg(d.key, d.value) FROM jsonb_each(structured_data) d WHERE d.key = ANY(%s::text[])),
+                                    '{}'::jsonb
+                                ) END
+                            FROM welcome_meta2 WHERE panel_id = ANY(%s)
+                        """
+                        cur.execute(query, (list(fields), panel_ids))
+                        return [row[0] for row in cur if row[0] is not None]
                     query = "SELECT structured_data FROM welcome_meta2 WHERE panel_id = ANY(%s)"
                     cur.execute(query, (panel_ids,))
                     # panel_id가 누락되지 않도록 structured_data 안에 포함되어 있다고 가정하거나 병합
-                    results = []
-                    for row in cur.fetchall():
-                        data = row[0]
-                        if data: results.append(data)
-                    return results
+                    return [row[0] for row in cur if row[0]]
         except Exception as e:
             logging.error(f"DB 패널 데이터 조회 실패: {e}")
             return []
@@ -49,40 +130,72 @@ class PanelRepository:
             raise e
 
     @staticmethod
-    def fetch_ordered_table_data(panel_ids: List[str]) -> List[Tuple[str, Dict]]:
-        """검색 결과 테이블용 데이터 조회 (순서 보장)"""
+    def fetch_ordered_table_data(panel_ids: List[str], fields: Optional[List[str]] = None) -> List[Tuple[str, Optional[Dict]]]:
+        """
+        검색 결과 테이블용 데이터 조회 (순서 보장)
+        fields를 주면 서버에서 해당 키만 남긴 JSONB를 반환하여 행마다 전체 문서를 전송/파싱하지 않음
+        (structured_data가 비어 있는 패널은 None)
+        """
         if not panel_ids: return []
         try:
             with get_db_connection_context() as conn:
                 with conn.cursor() as cur:
-                    query = """
-                        WITH id_order (panel_id, ordering) AS (
-                            SELECT * FROM unnest(%s::text[], %s::int[])
-                        )
-                        SELECT t.panel_id, t.structured_data
-                        FROM welcome_meta2 t
-                        JOIN id_order o ON t.panel_id = o.panel_id
-                        ORDER BY o.ordering;
-                    """
-                    cur.execute(query, (panel_ids, list(range(len(panel_ids)))))
+                    # 순번은 WITH ORDINALITY로 서버에서 생성 (순번 정수 배열을 만들어 전송하지 않음)
+                    if fields:
+                        query = """
+                            SELECT t.panel_id,
+                                CASE WHEN t.structured_data IS NULL OR t.structured_data = '{}'::jsonb THEN NULL
+                                ELSE COALESCE(
+                                    (SELECT jsonb_object_agg(d.key, d.value) FROM jsonb_each(t.structured_data) d WHERE d.key = ANY(%s::text[])),
+                                    '{}'::jsonb
+                                ) END
+                            FROM unnest(%s::text[]) WITH ORDINALITY AS o(panel_id, ordering)
+                            JOIN welcome_meta2 t ON t.panel_id = o.panel_id
+                            ORDER BY o.ordering;
+                        """
+                        cur.execute(query, (list(fields), panel_ids))
+                    else:
+                        query = """
+                            SELECT t.panel_id, NULLIF(t.structured_data, '{}'::jsonb)
+                            FROM unnest(%s::text[]) WITH ORDINALITY AS o(panel_id, ordering)
+                            JOIN welcome_meta2 t ON t.panel_id = o.panel_id
+                            ORDER BY o.ordering;
+                        """
+                        cur.execute(query, (panel_ids,))
                     return cur.fetchall()
         except Exception as e:
             logging.error(f"Table Data 조회 실패: {e}")
             return []
 
     @staticmethod
-    def search_panel_ids_by_sql(where_clause: str, params: List[Any]) -> Set[str]:
-        """동적 SQL(WHERE 절)을 실행하여 panel_id 집합 반환"""
-        if not where_clause: return set()
+    def search_panel_ids_by_sql(where_clause: str, params: List[Any], limit: Optional[int] = None) -> List[str]:
+        """
+        동적 SQL(WHERE 절)을 실행하여 panel_id 목록 반환 (panel_id는 PK이므로 중복 없음, 집합 변환 생략)
+        WHERE 절 형태별로 서버 측 PREPARE 문을 만들어 두고 재사용하여 반복 요청의 파싱/플래닝 비용을 줄임
+        limit을 주면 최대 limit개만 조회 (LIMIT도 파라미터로 바인딩, None이면 제한 없음)
+        DB 오류 시 PanelQueryError 발생 (빈 리스트는 조건에 맞는 패널이 없다는 뜻)
+        """
+        if not where_clause: return []
+        statement_name = "panel_ids_" + hashlib.sha1(where_clause.encode("utf-8")).hexdigest()[:16]
+        execute_params = tuple(params) + (limit,)
+        execute_sql = f"EXECUTE {statement_name} ({', '.join(['%s'] * len(execute_params))})"
+        position = iter(range(1, len(params) + 1))
+        prepared_where = _PLACEHOLDER_RE.sub(lambda _: f"${next(position)}", where_clause)
+        # 행 단위 전송/튜플 생성 대신 서버에서 text[] 한 행으로 모아 반환 (배열 파싱은 드라이버 C 코드에서 처리)
+        prepare_sql = (
+            f"PREPARE {statement_name} AS SELECT array_agg(panel_id) FROM "
+            f"(SELECT panel_id FROM welcome_meta2 {prepared_where} LIMIT ${len(execute_params)}::bigint) s"
+        )
         try:
             with get_db_connection_context() as conn:
                 with conn.cursor() as cur:
-                    query = f"SELECT panel_id FROM welcome_meta2 {where_clause}"
-                    cur.execute(query, tuple(params))
-                    return {str(row[0]) for row in cur.fetchall()}
+                    prepared_statement_cache.execute(conn, cur, statement_name, prepare_sql, execute_sql, execute_params)
+                    row = cur.fetchone()
+                    return row[0] if row and row[0] else []
         except Exception as e:
+            # 빈 리스트를 돌려주면 호출 측이 '조건 일치 0명'과 구분할 수 없으므로 오류로 전달
             logging.error(f"SQL 필터 검색 실패: {e}")
-            return set()
+            raise PanelQueryError(f"SQL 필터 검색 실패: {e}") from e
 
     @staticmethod
     def aggregate_field(query: str) -> Dict[str, float]:
@@ -104,7 +217,7 @@ class VectorRepository:
     """Qdrant Vector DB 접근 담당"""
 
     @staticmethod
-    def _scroll_all(collection_name: str, scroll_filter: Filter, with_payload: bool = True, with_vectors: bool = False, limit_per_req: int = 1000) -> List[Any]:
+    def _scroll_all(collection_name: str, scroll_filter: Filter, with_payload: Union[bool, List[str]] = True, with_vectors: bool = False, limit_per_req: int = 1000) -> List[Any]:
         """Qdrant Scroll 헬퍼 (전체 데이터 순회)"""
         client = get_qdrant_client()
         if not client: return []
@@ -129,43 +242,54 @@ class VectorRepository:
             return []
 
     @staticmethod
-    def fetch_qpoll_responses(panel_ids: List[str], questions: List[str]) -> List[Any]:
-        """특정 패널들의 특정 질문에 대한 응답 조회"""
+    async def _scroll_all_async(collection_name: str, scroll_filter: Filter, with_payload: Union[bool, List[str]] = True, limit_per_req: int = 1000) -> List[Any]:
+        """Qdrant Scroll 헬퍼 (비동기 클라이언트, 스레드풀 없이 이벤트 루프에서 직접 순회)"""
+        client = get_async_qdrant_client()
+        if not client: return []
+
+        all_points = []
+        next_offset = None
+        try:
+            while True:
+                points, next_offset = await client.scroll(
+                    collection_name=collection_name,
+                    scroll_filter=scroll_filter,
+                    limit=limit_per_req,
+                    offset=next_offset,
+                    with_payload=with_payload,
+                    with_vectors=False
+                )
+                all_points.extend(points)
+                if next_offset is None: break
+            return all_points
+        except Exception as e:
+            logging.error(f"Qdrant 비동기 Scroll 실패 ({collection_name}): {e}")
+            return []
+
+    @staticmethod
+    async def fetch_qpoll_responses_async(panel_ids: List[str], questions: List[str]) -> List[Any]:
+        """특정 패널들의 특정 질문에 대한 응답 조회 (payload는 question/sentence/panel_id만 사용)"""
         if not panel_ids or not questions: return []
-        
         query_filter = Filter(must=[
             FieldCondition(key="panel_id", match=MatchAny(any=panel_ids)),
             FieldCondition(key="question", match=MatchAny(any=questions))
         ])
-        
-        # limit 계산: 패널 수 * 질문 수 (여유있게)
-        limit = len(panel_ids) * len(questions)
-        
-        client = get_qdrant_client()
-        if not client: return []
-        
-        try:
-            # 여기서는 scroll 대신 한번에 가져오기 시도 (혹은 내부 루프)
-            # 대량일 경우 _scroll_all 사용 권장
-            return VectorRepository._scroll_all("qpoll_vectors_v2", query_filter)
-        except Exception as e:
-            logging.error(f"Q-Poll 응답 조회 실패: {e}")
-            return []
+        return await VectorRepository._scroll_all_async("qpoll_vectors_v2", query_filter, with_payload=["panel_id", "question", "sentence"])
 
     @staticmethod
-    def fetch_qpoll_for_panel(panel_id: str) -> List[Any]:
+    async def fetch_qpoll_for_panel_async(panel_id: str) -> List[Any]:
         """단일 패널의 모든 Q-Poll 응답 조회"""
         query_filter = Filter(must=[FieldCondition(key="panel_id", match=MatchValue(value=panel_id))])
-        return VectorRepository._scroll_all("qpoll_vectors_v2", query_filter, limit_per_req=100)
+        return await VectorRepository._scroll_all_async("qpoll_vectors_v2", query_filter, with_payload=["question", "sentence"], limit_per_req=100)
 
     @staticmethod
     def fetch_qpoll_by_question(question_text: str) -> List[Any]:
-        """특정 질문에 대한 모든 패널의 응답 조회 (통계용)"""
+        """특정 질문에 대한 모든 패널의 응답 조회 (통계용, 집계에 쓰는 sentence만 전송)"""
         query_filter = Filter(must=[FieldCondition(key="question", match=MatchValue(value=question_text))])
-        return VectorRepository._scroll_all("qpoll_vectors_v2", query_filter)
+        return VectorRepository._scroll_all("qpoll_vectors_v2", query_filter, with_payload=["sentence"])
 
     @staticmethod
-    def hybrid_search(collection_name: str, query_vector: List[float], query_filter: Optional[Filter] = None, limit: int = 100) -> List[Any]:
+    def hybrid_search(collection_name: str, query_vector: List[float], query_filter: Optional[Filter] = None, limit: int = 100, with_payload: Union[bool, List[str]] = True) -> List[Any]:
         """벡터 검색 수행"""
         client = get_qdrant_client()
         if not client: return []
@@ -175,7 +299,8 @@ class VectorRepository:
                 query_vector=query_vector,
                 query_filter=query_filter,
                 limit=limit,
-                with_payload=True
+                with_payload=with_payload,
+                with_vectors=False
             )
         except Exception as e:
             logging.error(f"Qdrant Search 실패: {e}")
@@ -0,0 +1,179 @@
+"""
+일회성 인덱스/양자화 설정 스크립트 (서비스 시작과 분리하여 배포/데이터 적재 후 수동 실행)
+
+    python scripts/create_indexes.py
+
+구조화 필터 술어(structured_data->>'field' = / IN, 출생연도 BETWEEN, structured_data @>)가 인덱스를 타도록
+동일한 표현식의 B-tree 인덱스, JSONB GIN 인덱스, 부분 일치(ILIKE ANY)용 트라이그램 GIN 인덱스를 생성하고
+마지막에 ANALYZE를 한 번 실행해 플래너가 새 인덱스의 통계를 사용하도록 합니다.
+CREATE INDEX CONCURRENTLY는 트랜잭션 안에서 실행할 수 없으므로 autocommit 전용 연결을 사용하며,
+이미 있는 인덱스는 건너뛰므로 여러 번 실행해도 안전합니다.
+Qdrant payload(panel_id/question, 테넌트) 인덱스와 검색 컬렉션의 INT8 스칼라 양자화도 여기서 설정합니다.
+(인덱스 생성/컬렉션 설정 변경은 운영 중인 컬렉션의 재색인·세그먼트 재구축을 유발하므로 서비스 시작 시 실행하지 않음)
+"""
+import os
+import sys
+import logging
+import psycopg2
+from qdrant_client.http.models import (
+    PayloadSchemaType, KeywordIndexParams, KeywordIndexType,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType
+)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from settings import settings
+from db import get_qdrant_client, close_qdrant_client
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+# 구조화 필터에서 자주 쓰는 JSONB 필드: structured_data->>'field' 표현식 B-tree 인덱스 대상
+POSTGRES_EXPRESSION_INDEX_FIELDS = [
+    "gender", "region_major", "region_minor", "marital_status", "education_level",
+    "job_title_raw", "income_household_monthly", "income_personal_monthly", "car_ownership",
+]
+
+# 부분 일치(ILIKE ANY '%값%') 필터 필드: pg_trgm GIN 인덱스 대상 (mapping_rules의 FUZZY_MATCH_FIELDS + ARRAY_FIELDS)
+POSTGRES_TRIGRAM_INDEX_FIELDS = [
+    "job_title_raw", "job_duty_raw", "car_model_raw", "car_manufacturer_raw", "phone_brand_raw", "phone_model_raw",
+    "drinking_experience", "owned_electronics", "smoking_experience", "smoking_brand", "e_cigarette_experience",
+]
+
+# MatchAny(panel_id) / MatchValue(question) 필터가 전체 스캔 대신 인덱스를 타도록 보장할 payload 필드
+# (question은 Q-Poll 통계/테이블 조회에서 범주형 사전 필터로 사용)
+QDRANT_PAYLOAD_INDEXES = {
+    "qpoll_vectors_v2": ["panel_id", "question"],
+    "welcome_subjective_vectors": ["metadata.panel_id"],
+}
+
+# 테넌트(is_tenant)로 지정할 payload 필드: 값 종류가 적고 한 값 단위로 통째로 조회되는 필드
+# (Q-Poll은 질문별 응답 집단을 한 번에 스크롤하므로, 같은 질문의 포인트를 저장소에서 인접 배치)
+QDRANT_TENANT_FIELDS = {
+    "qpoll_vectors_v2": {"question"},
+}
+
+# 검색 대상 컬렉션에 적용할 INT8 스칼라 양자화 (원본 FP32 벡터는 rescore용으로 유지)
+# 검색 측 SearchParams(quantization=QuantizationSearchParams(rescore=True, ...))와 짝을 이룸
+QDRANT_QUANTIZED_COLLECTIONS = ["qpoll_vectors_v2", "welcome_subjective_vectors"]
+QDRANT_SCALAR_QUANTIZATION = ScalarQuantization(
+    scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True)
+)
+
+
+def _postgres_index_statements():
+    """(인덱스 이름, CREATE 문) 목록"""
+    statements = [
+        (
+            f"idx_welcome_meta2_{field}",
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_welcome_meta2_{field} ON welcome_meta2 ((structured_data->>'{field}'))"
+        )
+        for field in POSTGRES_EXPRESSION_INDEX_FIELDS
+    ]
+    statements.append((
+        "idx_welcome_meta2_structured_data_path",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_welcome_meta2_structured_data_path ON welcome_meta2 USING GIN (structured_data jsonb_path_ops)"
+    ))
+    statements.append((
+        "idx_welcome_meta2_birth_year_int",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_welcome_meta2_birth_year_int ON welcome_meta2 (((structured_data->>'birth_year')::int))"
+    ))
+    statements += [
+        (
+            f"idx_welcome_meta2_{field}_trgm",
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_welcome_meta2_{field}_trgm ON welcome_meta2 USING GIN ((structured_data->>'{field}') gin_trgm_ops)"
+        )
+        for field in POSTGRES_TRIGRAM_INDEX_FIELDS
+    ]
+    return statements
+
+
+def _drop_if_invalid(cur, index_name: str):
+    """이전 CONCURRENTLY 생성이 중단되어 INVALID로 남은 인덱스는 IF NOT EXISTS에 걸려 재생성되지 않으므로 삭제"""
+    cur.execute(
+        "SELECT NOT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = %s",
+        (index_name,)
+    )
+    row = cur.fetchone()
+    if row and row[0]:
+        logging.warning(f"INVALID 인덱스 삭제 후 재생성: {index_name}")
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+
+
+def create_postgres_indexes():
+    conn = psycopg2.connect(
+        host=settings.DB_HOST,
+        database=settings.DB_NAME,
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        connect_timeout=5,
+        application_name=f"{settings.DB_APPLICATION_NAME}-create-indexes",
+    )
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            for index_name, statement in _postgres_index_statements():
+                try:
+                    _drop_if_invalid(cur, index_name)
+                    cur.execute(statement)
+                    logging.info(f"PostgreSQL 인덱스 확인 완료: {index_name}")
+                except Exception as e:
+                    logging.warning(f"PostgreSQL 인덱스 생성 실패 ({index_name}): {e}")
+            # 표현식 인덱스 통계는 ANALYZE 후에야 수집되므로 모든 인덱스 생성 후 한 번만 실행
+            cur.execute("ANALYZE welcome_meta2")
+            logging.info("PostgreSQL 구조화 필터 인덱스 확인 완료 (ANALYZE 완료)")
+    finally:
+        conn.close()
+
+
+def create_qdrant_payload_indexes():
+    """panel_id / question payload 인덱스가 없으면 생성합니다. (이미 있으면 무시, 테넌트 필드는 is_tenant 지정)"""
+    client = get_qdrant_client()
+    if not client:
+        return
+
+    for collection_name, fields in QDRANT_PAYLOAD_INDEXES.items():
+        tenant_fields = QDRANT_TENANT_FIELDS.get(collection_name, set())
+        for field_name in fields:
+            if field_name in tenant_fields:
+                field_schema = KeywordIndexParams(type=KeywordIndexType.KEYWORD, is_tenant=True)
+            else:
+                field_schema = PayloadSchemaType.KEYWORD
+            try:
+                client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field_name,
+                    field_schema=field_schema
+                )
+                logging.info(f"Qdrant payload 인덱스 확인 완료: {collection_name}.{field_name}")
+            except Exception as e:
+                logging.warning(f"Qdrant payload 인덱스 생성 실패 ({collection_name}.{field_name}): {e}")
+
+
+def create_qdrant_quantization():
+    """검색 컬렉션에 INT8 스칼라 양자화가 없으면 설정합니다. (이미 설정된 컬렉션은 건너뜀)"""
+    client = get_qdrant_client()
+    if not client:
+        return
+
+    for collection_name in QDRANT_QUANTIZED_COLLECTIONS:
+        try:
+            collection_info = client.get_collection(collection_name)
+            if collection_info.config.quantization_config is not None:
+                continue
+            client.update_collection(
+                collection_name=collection_name,
+                quantization_config=QDRANT_SCALAR_QUANTIZATION
+            )
+            logging.info(f"Qdrant INT8 양자화 설정 완료: {collection_name}")
+        except Exception as e:
+            logging.warning(f"Qdrant 양자화 설정 실패 ({collection_name}): {e}")
+
+
+if __name__ == "__main__":
+    create_postgres_indexes()
+    try:
+        create_qdrant_payload_indexes()
+        create_qdrant_quantization()
+    finally:
+        close_qdrant_client()
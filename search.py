@@ -1,31 +1,154 @@
+import atexit
 import logging
+import os
 import re
+import unicodedata
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import Dict, Optional, List, Set
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, List, Set, Tuple
 
-from qdrant_client.http.models import Filter, FieldCondition, MatchValue, MatchAny, MatchText
+from qdrant_client.http.models import Filter, FieldCondition, MatchValue, MatchAny, MatchText, SearchRequest
 from utils import WELCOME_OBJECTIVE_FIELDS
 from llm import parse_query_intelligent
 from semantic_router import router
 from search_helpers import (
-    search_welcome_objective, 
-    initialize_embeddings, 
-    filter_negative_conditions, 
-    embed_keywords
+    search_welcome_objective,
+    find_negative_panel_ids,
+    embed_keywords,
+    search_coalescer,
+    semantic_result_cache,
+    VECTOR_SEARCH_PARAMS
 )
 from mapping_rules import (
     QPOLL_FIELD_TO_TEXT, 
-    get_negative_patterns,
+    get_negative_matchers,
     VALUE_TRANSLATION_MAP
 )
 from db import get_qdrant_client
+from repository import PanelQueryError
 
+# 인구통계(정형) 필드명 집합 (라우팅 보정 판단용)
+OBJECTIVE_FIELD_SET = frozenset(f[0] for f in WELCOME_OBJECTIVE_FIELDS)
+
+# Reranking 병렬 요청 설정 (청크당 후보 수 / 동시 요청 수)
+RERANK_CHUNK_SIZE = 1000
+RERANK_WORKERS = 4
+RERANK_SCROLL_PAGE_SIZE = 2000
+
+def _create_executors():
+    """
+    요청마다 스레드를 만들고 버리지 않도록 모듈 수준에서 재사용하는 스레드 풀 생성
+    - rerank: Reranking 청크 요청용
+    - prefetch: SQL 필터 조회와 겹쳐서 의도 임베딩을 미리 계산
+    fork된 자식 프로세스에는 부모의 작업 스레드가 없으므로 자식에서 다시 호출해 새 풀을 만듦
+    """
+    global _rerank_executor, _prefetch_executor
+
+    _rerank_executor = ThreadPoolExecutor(max_workers=RERANK_WORKERS, thread_name_prefix="rerank")
+    _prefetch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+    atexit.register(_rerank_executor.shutdown, wait=False)
+    atexit.register(_prefetch_executor.shutdown, wait=False)
+
+_create_executors()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_create_executors)
+
+# Reranking 대상 상한: 이를 넘으면 앞쪽 RERANK_CAPPED_CANDIDATES명만 재정렬
+# (Reranking으로만 쓰이는 SQL 결과는 상한 + 1명까지만 조회해 버려질 행을 가져오지 않음)
+RERANK_MAX_CANDIDATES = 10000
+RERANK_CAPPED_CANDIDATES = 5000
+
+# 일반 벡터 검색(SQL 필터 없음)에서 Qdrant에 요청할 최대 결과 수
+VECTOR_SEARCH_MAX_K = RERANK_MAX_CANDIDATES
+
+# Reranking에 실제로 사용하는 payload 필드만 요청 (컬렉션별)
+RERANK_PAYLOAD_FIELDS = {
+    "qpoll_vectors_v2": ["panel_id", "question", "sentence", "page_content"],
+    "welcome_subjective_vectors": ["metadata.panel_id", "question", "page_content", "sentence"],
+}
+DEFAULT_RERANK_PAYLOAD_FIELDS = ["panel_id", "metadata.panel_id", "question", "page_content", "sentence"]
+
+# 알파벳, 한글, 숫자를 제외한 문자 (특수문자, 공백)
+NORM_RE = re.compile(r'[^a-zA-Z0-9가-힣]')
+WHITESPACE_RE = re.compile(r'\s+')
+
+@lru_cache(maxsize=8192)
 def normalize_text(text: str) -> str:
-    """[New] 텍스트 정규화: 공백, 특수문자 제거 후 비교용 문자열 생성"""
+    """[New] 텍스트 정규화: 공백, 특수문자 제거 후 비교용 문자열 생성 (질문 텍스트는 반복되므로 캐시)"""
     if not text: return ""
-    # 알파벳, 한글, 숫자만 남기고 모두 제거 (특수문자, 공백 무시)
-    return re.sub(r'[^a-zA-Z0-9가-힣]', '', text)
+    # 전각/호환 문자를 표준형으로 통일(NFKC)한 뒤 알파벳, 한글, 숫자만 남기고 모두 제거
+    return NORM_RE.sub('', unicodedata.normalize('NFKC', text))
+
+def _negative_answer_mask(answers: List[str], negative_matchers: Tuple[Tuple[str, ...], Optional[re.Pattern]]) -> np.ndarray:
+    """부정 답변 여부 마스크: 리터럴은 공백 제거 텍스트에 np.char.find, 나머지만 정규식 검사"""
+    literals, negative_regex = negative_matchers
+    mask = np.zeros(len(answers), dtype=bool)
+    if not answers:
+        return mask
+
+    if literals:
+        stripped = np.array([WHITESPACE_RE.sub('', answer) for answer in answers], dtype=str)
+        for literal in literals:
+            mask |= np.char.find(stripped, literal) >= 0
+
+    if negative_regex:
+        for i, answer in enumerate(answers):
+            if not mask[i] and negative_regex.search(answer):
+                mask[i] = True
+    return mask
+
+def _extract_ids(payloads: list, id_key_path: str) -> List[Optional[str]]:
+    """payload별 panel_id 추출 (컬렉션별 ID 경로 사용)"""
+    if id_key_path.startswith("metadata."):
+        id_key = id_key_path.split(".", 1)[1]
+        return [(payload.get('metadata') or {}).get(id_key) for payload in payloads]
+    return [payload.get(id_key_path) for payload in payloads]
+
+def _answer_text(payload: dict) -> str:
+    return payload.get('page_content') or payload.get('sentence') or ""
+
+def _extract_ids_filtered(payloads: list, negative_matchers: Tuple[Tuple[str, ...], Optional[re.Pattern]], id_key_path: str) -> List[Optional[str]]:
+    """payload별 panel_id 추출 (부정 답변이거나 ID가 없으면 None)"""
+    pids = _extract_ids(payloads, id_key_path)
+    negative_mask = _negative_answer_mask([_answer_text(payload) for payload in payloads], negative_matchers)
+    return [None if negative else pid for pid, negative in zip(pids, negative_mask)]
+
+def _rank_panels(
+    ordered_rows: np.ndarray,
+    pids: List[Optional[str]],
+    payloads: list,
+    negative_matchers: Tuple[Tuple[str, ...], Optional[re.Pattern]]
+) -> List[str]:
+    """
+    점수 순으로 정렬된 행에서 패널별 '부정이 아닌 최고 점수 답변' 기준 순위를 계산합니다.
+    한 사람의 여러 답변 중 하위 답변은 상위 답변이 부정으로 걸러졌을 때만 검사합니다.
+    """
+    positions_by_panel: Dict[str, List[int]] = {}
+    for pos, row in enumerate(ordered_rows):
+        pid = pids[row]
+        if pid:
+            positions_by_panel.setdefault(pid, []).append(pos)
+
+    accepted: Dict[str, int] = {}
+    pending = list(positions_by_panel)
+    depth = 0
+    while pending:
+        positions = [positions_by_panel[pid][depth] for pid in pending]
+        answers = [_answer_text(payloads[ordered_rows[pos]]) for pos in positions]
+        negative_mask = _negative_answer_mask(answers, negative_matchers)
+
+        next_pending = []
+        for pid, pos, negative in zip(pending, positions, negative_mask):
+            if not negative:
+                accepted[pid] = pos
+            elif depth + 1 < len(positions_by_panel[pid]):
+                next_pending.append(pid)
+        pending = next_pending
+        depth += 1
+
+    return sorted(accepted, key=accepted.__getitem__)
 
 def rerank_candidates(
     candidate_ids: list,
@@ -33,124 +156,111 @@ def rerank_candidates(
     qdrant_client,
     collection_name: str,
     id_key_path: str,
-    negative_patterns: list,
-    target_question: str = None  
+    negative_matchers: Tuple[Tuple[str, ...], Optional[re.Pattern]],
+    target_question: str = None
 ) -> list:
     """
     [핵심 로직] In-Memory Reranking (Hybrid Fetching & Fuzzy Matching)
     - 대상이 적을 때(2000명 이하): 질문 필터 없이 데이터를 가져와 Python에서 정밀/유연하게 매칭 (누락 방지)
     - 대상이 많을 때: DB 필터 사용 (속도 최적화)
     """
-    # [Safety Cap] 대상이 너무 많으면 상위 5000명으로 제한
-    if len(candidate_ids) > 10000:
-        logging.warning(f"⚠️ Reranking 대상이 너무 많음 ({len(candidate_ids)}명). 상위 5000명만 수행합니다.")
-        candidate_ids = candidate_ids[:5000]
+    # [Safety Cap] 대상이 너무 많으면 상위 RERANK_CAPPED_CANDIDATES명으로 제한
+    if len(candidate_ids) > RERANK_MAX_CANDIDATES:
+        logging.warning(f"⚠️ Reranking 대상이 너무 많음 ({len(candidate_ids)}명 이상). 상위 {RERANK_CAPPED_CANDIDATES}명만 수행합니다.")
+        candidate_ids = candidate_ids[:RERANK_CAPPED_CANDIDATES]
 
     # [전략 결정] 대상이 적고 타겟 질문이 있으면 -> Python 유연 필터링 사용 (DB 필터 미사용)
     # 이유: DB의 MatchText는 특수문자(·, ()) 처리가 엄격하여 데이터를 놓칠 수 있음
     use_python_filter = (len(candidate_ids) <= 2000) and (target_question is not None)
 
-    must_conditions = [
-        FieldCondition(
-            key=id_key_path, 
-            match=MatchAny(any=[str(pid) for pid in candidate_ids])
-        )
-    ]
-    
     # DB 레벨 질문 필터는 '대량이거나 질문이 없을 때'만 사용
+    question_conditions = []
     if target_question and not use_python_filter:
-        must_conditions.append(
+        question_conditions.append(
             FieldCondition(key="question", match=MatchText(text=target_question))
         )
 
-    search_filter = Filter(must=must_conditions)
-
-    # 1. 데이터 조회 (Batch Scroll)
-    batch_size = 2000 
-    all_points = []
-    offset = None
-    
-    while True:
-        points, next_offset = qdrant_client.scroll(
-            collection_name=collection_name,
-            scroll_filter=search_filter,
-            limit=batch_size,
-            with_vectors=True,
-            with_payload=True,
-            offset=offset
-        )
-        all_points.extend(points)
-        offset = next_offset
-        if offset is None:
-            break
-            
-    if not all_points:
+    # 1. 데이터 조회 (후보를 청크로 나눠 병렬 Scroll, 한 패널의 여러 포인트를 빠짐없이 가져옴)
+    # candidate_ids는 SQL 결과(문자열 panel_id)이므로 재변환 없이 그대로 전달
+    chunk_filters = [
+        Filter(must=[
+            FieldCondition(key=id_key_path, match=MatchAny(any=candidate_ids[i:i + RERANK_CHUNK_SIZE])),
+            *question_conditions
+        ])
+        for i in range(0, len(candidate_ids), RERANK_CHUNK_SIZE)
+    ]
+    payload_fields = RERANK_PAYLOAD_FIELDS.get(collection_name, DEFAULT_RERANK_PAYLOAD_FIELDS)
+
+    def scroll_chunk(search_filter: Filter) -> tuple:
+        chunk_payloads = []
+        chunk_vectors = []
+        offset = None
+        while True:
+            points, next_offset = qdrant_client.scroll(
+                collection_name=collection_name,
+                scroll_filter=search_filter,
+                limit=RERANK_SCROLL_PAGE_SIZE,
+                with_vectors=True,
+                with_payload=payload_fields,
+                offset=offset
+            )
+            if points:
+                # 페이지 단위로 바로 float32 행렬로 변환하여 Python float 리스트를 조기 해제
+                chunk_vectors.append(np.asarray([p.vector for p in points], dtype=np.float32))
+                chunk_payloads.extend(p.payload or {} for p in points)
+            offset = next_offset
+            if offset is None:
+                break
+        return chunk_payloads, chunk_vectors
+
+    if len(chunk_filters) <= 1:
+        results = [scroll_chunk(search_filter) for search_filter in chunk_filters]
+    else:
+        # 청크 간 직렬 왕복 지연을 없애기 위해 동시에 요청 (gRPC 연결 공유)
+        results = list(_rerank_executor.map(scroll_chunk, chunk_filters))
+
+    payloads = []
+    vector_pages = []
+    for chunk_payloads, chunk_vectors in results:
+        payloads.extend(chunk_payloads)
+        vector_pages.extend(chunk_vectors)
+    del results
+
+    if not payloads:
         return []
 
+    # 페이지별 행렬을 연속된 float32 버퍼 하나로 결합 (1회 복사)
+    matrix = np.concatenate(vector_pages) if len(vector_pages) > 1 else vector_pages[0]
+    del vector_pages
+
     # 2. [정밀 로직] Python 레벨에서 질문 매칭 (use_python_filter 모드)
-    target_points = []
     if use_python_filter:
         norm_target = normalize_text(target_question)
         
-        for p in all_points:
-            p_question = p.payload.get("question", "")
-            # 정규화된 문자열로 포함 여부 확인 (띄어쓰기, 특수문자 무시하고 비교)
-            if norm_target in normalize_text(p_question):
-                target_points.append(p)
+        # 정규화된 문자열로 포함 여부 확인 (띄어쓰기, 특수문자 무시하고 비교)
+        # 마스크를 유사도 계산 전에 적용하여 살아남은 행만 행렬 곱에 사용
+        norm_questions = [normalize_text(payload.get("question") or "") for payload in payloads]
+        question_mask = np.fromiter(
+            (norm_target in q for q in norm_questions), dtype=bool, count=len(norm_questions)
+        )
         
         # 만약 매칭된 게 하나도 없다면(데이터 오류 등), 필터 없이 전체 사용 (Fallback)
-        if not target_points and all_points:
+        if not question_mask.any():
             logging.warning(f"⚠️ 질문 매칭 실패 (Target: {target_question[:10]}...). 전체 데이터를 사용합니다.")
-            target_points = all_points
-    else:
-        target_points = all_points
-
-    if not target_points:
-        return []
-
-    # 3. 유사도 계산 및 부정어 필터링
-    vectors = [p.vector for p in target_points]
-    query_vec_np = np.array([query_vector])
-    
-    # 코사인 유사도 계산
-    scores = cosine_similarity(query_vec_np, vectors)[0]
-
-    scored_results = []
-    for i, point in enumerate(target_points):
-        score = scores[i]
-        payload = point.payload
-        
-        # 답변 텍스트 추출
-        answer_text = payload.get('page_content') or payload.get('sentence') or ""
-        
-        # 부정어 필터링 (정규식 검사)
-        is_negative = False
-        for pattern in negative_patterns:
-            if re.search(pattern, answer_text):
-                is_negative = True
-                break
-        
-        if is_negative:
-            continue  # 부정 답변은 결과에서 제외
-            
-        # ID 추출
-        pid = payload.get('panel_id') or payload.get('metadata', {}).get('panel_id')
-        
-        if pid:
-            scored_results.append((pid, score))
+        elif not question_mask.all():
+            matrix = matrix[question_mask]
+            payloads = [payload for payload, keep in zip(payloads, question_mask) if keep]
 
-    # 4. 점수 내림차순 정렬
-    scored_results.sort(key=lambda x: x[1], reverse=True)
-    
-    # 중복 제거 (한 사람이 여러 답변을 했을 경우 최고 점수만 유지)
-    seen_pids = set()
-    unique_results = []
-    for pid, score in scored_results:
-        if pid not in seen_pids:
-            unique_results.append(pid)
-            seen_pids.add(pid)
+    # 행/쿼리를 미리 L2 정규화하면 코사인 유사도 = 단일 행렬-벡터 곱 (BLAS 1회)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+    query_vec_np = np.asarray(query_vector, dtype=np.float32)
+    query_vec_np /= np.linalg.norm(query_vec_np) + 1e-12
+    scores = matrix @ query_vec_np
 
-    return unique_results
+    # 3. 점수 내림차순 정렬 + 부정어 필터링 + 중복 제거
+    pids = _extract_ids(payloads, id_key_path)
+    order = np.argsort(-scores, kind='stable')
+    return _rank_panels(order, pids, payloads, negative_matchers)
 
 def hybrid_search(query: str, limit: Optional[int] = None) -> Dict:
     """
@@ -182,10 +292,8 @@ def hybrid_search(query: str, limit: Optional[int] = None) -> Dict:
             target_field = target_field_info['field']
             target_desc = target_field_info['description']
 
-        objective_field_names = [f[0] for f in WELCOME_OBJECTIVE_FIELDS]
-        
-        # 라우팅 보정
-        if target_field in objective_field_names:
+        # 라우팅 보정 (조건이 1개뿐이면 대체 후보가 없으므로 생략)
+        if target_field in OBJECTIVE_FIELD_SET and len(all_conditions) > 1:
             for cond in all_conditions:
                 kw = cond.get('original_keyword', '')
                 if kw == intent: continue 
@@ -198,8 +306,16 @@ def hybrid_search(query: str, limit: Optional[int] = None) -> Dict:
                     intent = kw 
                     break
 
+        # Q-Poll 타겟이면 벡터 검색이 확실하므로, 의도 임베딩을 SQL 조회와 동시에 시작 (결과는 임베딩 캐시에 적재)
+        intent_prefetch = None
+        if intent and target_field in QPOLL_FIELD_TO_TEXT and structured_filters:
+            intent_prefetch = _prefetch_executor.submit(embed_keywords, [intent])
+
         # 3. 1차 필터링 (SQL - 인구통계)
-        filtered_panel_ids = set()
+        # SQL 결과는 저장소에서 받은 리스트를 그대로 이후 단계(Rerank/최종 결과)에서 재사용 (집합 <-> 리스트 변환 없음)
+        filtered_panel_ids: List[str] = []
+        # SQL을 실제로 실행했는지 여부 (WHERE 절을 만들 수 없으면 필터 없이 벡터 검색으로 진행)
+        sql_executed = False
         
         if structured_filters or target_field:
             filters_for_sql = []
@@ -237,18 +353,36 @@ def hybrid_search(query: str, limit: Optional[int] = None) -> Dict:
                     filters_for_sql.append({"field": target_field, "operator": "not_null", "value": "check"})
             
             if filters_for_sql:
-                panel_ids, _ = search_welcome_objective(filters_for_sql, attempt_name="V3_Filter_Optimized")
-                filtered_panel_ids = panel_ids
+                # Q-Poll 타겟이면 SQL 결과는 Reranking 후보로만 쓰이므로 상한 + 1명까지만 조회
+                max_results = RERANK_MAX_CANDIDATES + 1 if intent and target_field in QPOLL_FIELD_TO_TEXT else None
+                try:
+                    sql_results, _ = search_welcome_objective(
+                        filters_for_sql, attempt_name="V3_Filter_Optimized", max_results=max_results
+                    )
+                except PanelQueryError:
+                    # DB 오류를 '조건 일치 0명'으로 취급하면 아래 Fast Path가 빈 결과를 정상 응답처럼 반환하므로 그대로 전파
+                    logging.error(f"❌ 구조화 필터 조회 실패 -> 검색 중단 (filters: {filters_for_sql})")
+                    raise
+                if sql_results is not None:
+                    sql_executed = True
+                    filtered_panel_ids = sql_results
+
+        # [Fast Path] 인구통계 조건으로 SQL을 실행했는데 0명이면 임베딩/Qdrant 호출 없이 즉시 종료
+        # (전체 대상 벡터 검색으로 넘어가면 사용자가 지정한 인구통계 조건이 무시됨)
+        # WHERE 절을 만들지 못해 SQL을 실행하지 않은 경우는 기존처럼 벡터 검색으로 진행
+        if structured_filters and sql_executed and not filtered_panel_ids:
+            logging.info("⏭️ 인구통계 조건 일치 패널 없음 -> 벡터 검색 생략")
+            return {
+                "final_panel_ids": [],
+                "total_count": 0,
+                "search_intent": intent,
+                "target_field": target_field,
+                "target_field_desc": target_desc
+            }
         
-        # 검색 범위 설정
-        if filtered_panel_ids:
-            vector_search_k = max(len(filtered_panel_ids), user_limit * 5)
-            vector_search_k = min(vector_search_k, 3000) 
-        else:
-            vector_search_k = max(user_limit * 5, 500)
-
         final_panel_ids = filtered_panel_ids
-        vector_matched_ids = set() 
+        # 유사도 순위를 보존하는 정렬된 ID 리스트
+        vector_matched_ids: List[str] = []
 
         is_structured_target = target_field and target_field not in QPOLL_FIELD_TO_TEXT
         
@@ -260,10 +394,21 @@ def hybrid_search(query: str, limit: Optional[int] = None) -> Dict:
         # [Case B] 벡터 검색 필요
         elif intent and target_field:
             qdrant_client = get_qdrant_client()
-            embeddings = initialize_embeddings()
-            query_vector = embeddings.embed_query(intent)
+
+            # 의도 + 부정 조건 키워드를 한 번의 배치로 임베딩 (부정 조건은 일반 검색 모드에서만 사용)
+            neg_keywords = []
+            if not filtered_panel_ids:
+                for nc in negative_conditions:
+                    neg_keywords.extend(nc.get('expanded_queries', []))
+
+            if intent_prefetch is not None:
+                intent_prefetch.result()
+            all_vectors = embed_keywords([intent] + neg_keywords)
+            if not all_vectors:
+                raise RuntimeError(f"의도 임베딩 실패: {intent}")
+            query_vector = all_vectors[0]
+            neg_vectors = all_vectors[1:]
             
-            is_welcome_collection = False
             target_question_text = None 
 
             if target_field in QPOLL_FIELD_TO_TEXT:
@@ -273,9 +418,8 @@ def hybrid_search(query: str, limit: Optional[int] = None) -> Dict:
             else:
                 collection_name = "welcome_subjective_vectors"
                 id_key_path = "metadata.panel_id"
-                is_welcome_collection = True
 
-            negative_patterns = get_negative_patterns(target_field)
+            negative_matchers = get_negative_matchers(target_field)
 
             # ------------------------------------------------------------------
             # [분기 1] SQL 필터 결과가 있음 -> Reranking (전수 조사)
@@ -284,16 +428,16 @@ def hybrid_search(query: str, limit: Optional[int] = None) -> Dict:
                 logging.info(f"🚀 Reranking 모드 진입: {len(filtered_panel_ids)}명 대상 정밀 검사")
                 
                 reranked_ids = rerank_candidates(
-                    candidate_ids=list(filtered_panel_ids),
+                    candidate_ids=filtered_panel_ids,
                     query_vector=query_vector,
                     qdrant_client=qdrant_client,
                     collection_name=collection_name,
                     id_key_path=id_key_path,
-                    negative_patterns=negative_patterns,
+                    negative_matchers=negative_matchers,
                     target_question=target_question_text 
                 )
                 
-                vector_matched_ids = set(reranked_ids)
+                vector_matched_ids = reranked_ids
                 logging.info(f"✅ Reranking 완료: {len(filtered_panel_ids)}명 -> {len(vector_matched_ids)}명 (부정 답변 제외됨)")
 
             # ------------------------------------------------------------------
@@ -301,75 +445,75 @@ def hybrid_search(query: str, limit: Optional[int] = None) -> Dict:
             # ------------------------------------------------------------------
             else:
                 logging.info("🔍 일반 벡터 검색 모드 진입 (SQL 필터 없음)")
-                must_conditions = []
+                # 검색 범위: 요청 인원의 5배 (최소 500명), LLM이 뽑은 인원 수가 과도해도 상한 이내로 제한
+                vector_search_k = min(max(user_limit * 5, 500), VECTOR_SEARCH_MAX_K)
+                # 거의 같은 의도(코사인 ≥ 0.97)의 이전 검색 결과가 있으면 Qdrant 검색/필터링 전체를 생략
+                cache_context = (collection_name, target_field, vector_search_k, tuple(neg_keywords))
+                cached_ids = semantic_result_cache.get(cache_context, query_vector)
+                if cached_ids is not None:
+                    logging.info(f"♻️ 유사 쿼리 결과 캐시 적중: {len(cached_ids)}명")
+                    vector_matched_ids = list(cached_ids)
+                else:
+                    must_conditions = []
                 
-                # 일반 검색에서도 특수문자 이슈가 있을 수 있으나, 
-                # 대량 검색이므로 속도를 위해 DB 필터를 유지하되, 검색이 안 되면 필터 없이 시도하는 로직 추가 가능
-                # (여기서는 기존 로직 유지)
-                if target_question_text:
-                     must_conditions.append(FieldCondition(key="question", match=MatchText(text=target_question_text)))
+                    # 일반 검색에서도 특수문자 이슈가 있을 수 있으나, 
+                    # 대량 검색이므로 속도를 위해 DB 필터를 유지하되, 검색이 안 되면 필터 없이 시도하는 로직 추가 가능
+                    # (여기서는 기존 로직 유지)
+                    if target_question_text:
+                         must_conditions.append(FieldCondition(key="question", match=MatchText(text=target_question_text)))
 
-                qdrant_filter = Filter(must=must_conditions)
+                    qdrant_filter = Filter(must=must_conditions)
 
-                search_results = []
-                try:
-                    search_results = qdrant_client.search(
-                        collection_name=collection_name, 
-                        query_vector=query_vector,
-                        query_filter=qdrant_filter,
-                        limit=vector_search_k,
-                        with_payload=True 
-                    )
-                except Exception as e:
-                    logging.error(f"❌ Qdrant 검색 실패: {e}")
                     search_results = []
-
-                valid_hits_count = 0
-                
-                for hit in search_results:
-                    if not hit.payload: continue
-                    
-                    answer_text = hit.payload.get('page_content') or hit.payload.get('sentence') or ""
-
-                    is_negative = False
-                    for pattern in negative_patterns:
-                        if re.search(pattern, answer_text):
-                            is_negative = True
-                            break 
-                    
-                    if is_negative: continue
-
-                    pid = None
-                    if is_welcome_collection:
-                        meta = hit.payload.get('metadata', {})
-                        pid = meta.get('panel_id')
-                    else:
-                        pid = hit.payload.get('panel_id')
-                    
-                    if pid:
-                        vector_matched_ids.add(pid)
-                        valid_hits_count += 1
+                    search_failed = False
+                    try:
+                        # 동시 요청과 묶어 search_batch로 전송
+                        search_results = search_coalescer.search(
+                            qdrant_client,
+                            collection_name,
+                            SearchRequest(
+                                vector=query_vector,
+                                filter=qdrant_filter,
+                                limit=vector_search_k,
+                                params=VECTOR_SEARCH_PARAMS,
+                                with_payload=["page_content", "sentence", id_key_path],
+                                with_vector=False
+                            )
+                        )
+                    except Exception as e:
+                        logging.error(f"❌ Qdrant 검색 실패: {e}")
+                        search_results = []
+                        search_failed = True
+
+                    # 검색 결과는 유사도 순이므로 순서를 유지한 채 중복 제거
+                    pids = _extract_ids_filtered([hit.payload for hit in search_results if hit.payload], negative_matchers, id_key_path)
+                    vector_matched_ids = list(dict.fromkeys(pid for pid in pids if pid))
                 
-                logging.info(f"   ✂️ 텍스트 필터링 결과: 검색 {len(search_results)}명 -> 유효 {valid_hits_count}명")
+                    logging.info(f"   ✂️ 텍스트 필터링 결과: 검색 {len(search_results)}명 -> 유효 {len(vector_matched_ids)}명")
                 
-                # [검증 2] 벡터 기반 부정 조건 필터링
-                if negative_conditions and vector_matched_ids:
-                     neg_keywords = []
-                     for nc in negative_conditions:
-                         neg_keywords.extend(nc.get('expanded_queries', []))
-                     
-                     if neg_keywords:
-                         logging.info(f"🚫 부정 조건 필터링 적용 (벡터): {neg_keywords}")
-                         neg_vectors = embed_keywords(neg_keywords)
-                         vector_matched_ids = filter_negative_conditions(
-                             panel_ids=vector_matched_ids,
-                             negative_keywords=neg_keywords,
-                             query_vectors=neg_vectors,
-                             qdrant_client=qdrant_client,
-                             collection_name=collection_name,
-                             threshold=0.55 
-                         )
-                         logging.info(f"   ✂️ 벡터 부정 필터링 후 남은 인원: {len(vector_matched_ids)}명")
+                    # [검증 2] 벡터 기반 부정 조건 필터링
+                    if neg_keywords and neg_vectors and vector_matched_ids:
+                        logging.info(f"🚫 부정 조건 필터링 적용 (벡터): {neg_keywords}")
+                        excluded_ids = find_negative_panel_ids(
+                            panel_ids=vector_matched_ids,
+                            negative_keywords=neg_keywords,
+                            query_vectors=neg_vectors,
+                            qdrant_client=qdrant_client,
+                            collection_name=collection_name,
+                            threshold=0.55,
+                            id_key_path=id_key_path
+                        )
+                        if excluded_ids is None:
+                            # 부정 필터링 실패: 이번 응답은 필터링 없이 반환하되, 걸러지지 않은 결과를 캐시에 남기지 않음
+                            logging.warning("⚠️ 부정 조건 필터링 실패 -> 결과 캐시 저장 생략")
+                            search_failed = True
+                        # 정렬 순서를 유지한 채 한 번의 순회로 제외 대상만 걸러냄
+                        elif excluded_ids:
+                            vector_matched_ids = [pid for pid in vector_matched_ids if pid not in excluded_ids]
+                        logging.info(f"   ✂️ 벡터 부정 필터링 후 남은 인원: {len(vector_matched_ids)}명")
+
+                    if not search_failed:
+                        semantic_result_cache.put(cache_context, query_vector, vector_matched_ids)
 
             final_panel_ids = vector_matched_ids
 
@@ -377,17 +521,18 @@ def hybrid_search(query: str, limit: Optional[int] = None) -> Dict:
             logging.debug("  - 의도/타겟 없음. 1차 필터 결과 사용.")
             final_panel_ids = filtered_panel_ids
 
-        final_panel_ids_list = list(final_panel_ids)
-        logging.info(f"✅ 검색 완료: {len(final_panel_ids_list)}명")
+        logging.info(f"✅ 검색 완료: {len(final_panel_ids)}명")
 
         return {
-            "final_panel_ids": final_panel_ids_list,
-            "total_count": len(final_panel_ids_list),
+            "final_panel_ids": final_panel_ids,
+            "total_count": len(final_panel_ids),
             "search_intent": intent,
             "target_field": target_field,
             "target_field_desc": target_desc
         }
 
+    except PanelQueryError:
+        raise
     except Exception as e:
         logging.error(f"❌ hybrid_search 오류: {e}", exc_info=True)
         return {
@@ -1,18 +1,26 @@
 import os
 import re
+import json
+import hashlib
+import sqlite3
 import logging
 import threading
-from typing import List, Set, Optional, Dict, Tuple
-from datetime import datetime
-from collections import defaultdict
+import time
+import itertools
+import numpy as np
+import torch
+from typing import Any, List, Set, Optional, Dict, Tuple
 from functools import lru_cache
+from collections import defaultdict, OrderedDict
+from concurrent.futures import Future
 from dotenv import load_dotenv
 
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Filter, FieldCondition, MatchAny, SearchParams
-from langchain_huggingface import HuggingFaceEmbeddings
+from qdrant_client.http.models import Filter, FieldCondition, MatchAny, SearchParams, QuantizationSearchParams, SearchRequest
+from sentence_transformers import SentenceTransformer
 from repository import PanelRepository
 from db import get_db_connection_context
+from utils import get_current_year
 from mapping_rules import (
     CATEGORY_MAPPING, 
     get_field_mapping,
@@ -22,29 +30,134 @@ from mapping_rules import (
     ARRAY_FIELDS
 )
 
+# HNSW 탐색 폭(ef): 재현율이 중요한 대량 검색용
+HNSW_EF_RECALL = 256
+
+# 근사(HNSW) 벡터 검색 파라미터: 인덱싱이 끝난 세그먼트만 탐색해 전수 검색 폴백을 막고,
+# 양자화 벡터로 2배수 후보를 훑은 뒤 원본 벡터로 재채점 (양자화 미설정 컬렉션에서는 무시됨)
+VECTOR_SEARCH_PARAMS = SearchParams(
+    hnsw_ef=HNSW_EF_RECALL,
+    exact=False,
+    indexed_only=True,
+    quantization=QuantizationSearchParams(rescore=True, oversampling=2.0)
+)
+
+# SQL 빌더 캐시 적중 현황을 로그로 남기는 호출 간격
+BUILD_SQL_CACHE_LOG_INTERVAL = 500
+_build_sql_calls = itertools.count(1)
+
+# 부정 조건 필터링 시 한 번의 MatchAny 필터에 담을 최대 panel_id 수
+NEGATIVE_FILTER_CHUNK_SIZE = 1000
+
+# 소득 카테고리 정의 (최소, 최대, 라벨)
+INCOME_RANGES = (
+    (0, 999999, "월 100만원 미만"),
+    (1000000, 1999999, "월 100~199만원"),
+    (2000000, 2999999, "월 200~299만원"),
+    (3000000, 3999999, "월 300~399만원"),
+    (4000000, 4999999, "월 400~499만원"),
+    (5000000, 5999999, "월 500~599만원"),
+    (6000000, 6999999, "월 600~699만원"),
+    (7000000, 999999999, "월 700만원 이상")
+)
+INCOME_FIELDS = frozenset({"income_household_monthly", "income_personal_monthly"})
+RANGE_OPERATORS = frozenset({"gte", "lte", "between"})
+
+# ILIKE 부분 일치로 검색하는 필드 (문자열 + 배열형)
+FUZZY_OR_ARRAY_FIELDS = frozenset(FUZZY_MATCH_FIELDS) | frozenset(ARRAY_FIELDS)
+
+# 단일 문자열 일치를 structured_data @> '{"field": "값"}' 포함 조건으로 보내는 범주형 필드
+# (값이 항상 JSON 문자열로 저장되는 필드만 대상, ->> 비교와 결과가 같음)
+CONTAINMENT_EQ_FIELDS = frozenset({
+    "gender", "region_major", "region_minor", "marital_status", "education_level", "car_ownership",
+})
+
+# not_null 조건에서 '응답 있음'으로 보지 않을 부정 응답 패턴 (필드별)
+NOT_NULL_EXCLUDE_PATTERNS = {
+    "drinking_experience": "마시지|않음|없음|비음주|금주|안\\s*마심|전혀",
+    "smoking_experience": "피우지|않음|없음|비흡연|금연|안\\s*피움",
+    "ott_count": "0개|안\\s*함|없음|이용\\s*안|보지\\s*않음",
+    "fast_delivery_usage": "안\\s*함|이용\\s*안|없음|직접\\s*구매",
+}
+DEFAULT_NOT_NULL_EXCLUDE_PATTERN = "없음|비흡연|해당사항|피우지|금연"
+
+# 부분 일치 검색 시 함께 제외할 부정 응답 패턴 (배열형 경험 필드)
+FUZZY_EXCLUDE_PATTERNS = {
+    "drinking_experience": NOT_NULL_EXCLUDE_PATTERNS["drinking_experience"],
+    "smoking_experience": NOT_NULL_EXCLUDE_PATTERNS["smoking_experience"],
+}
+
+def _expand_translated_value(value: Any) -> Any:
+    """번역된 값 1개를 카테고리 확장: 여러 값으로 펼쳐지면 tuple, 아니면 원래 값 그대로"""
+    if isinstance(value, list):
+        expanded = []
+        for v in value:
+            expanded.extend(CATEGORY_MAPPING.get(str(v), (v,)))
+        return tuple(expanded)
+    if str(value) in CATEGORY_MAPPING:
+        return tuple(CATEGORY_MAPPING[str(value)])
+    return value
+
+# 필드별 입력값 -> (번역 + 카테고리 확장) 결과를 import 시 미리 계산한 조회표
+# (필터 값마다 번역 맵/카테고리 맵을 차례로 뒤지는 대신 dict 조회 1회)
+VALUE_EXPANSION_DISPATCH: Dict[str, Dict[Any, Any]] = {
+    field: {key: _expand_translated_value(mapped) for key, mapped in mapping.items()}
+    for field, mapping in VALUE_TRANSLATION_MAP.items()
+}
+
+def _expand_filter_value(field: str, value: Any) -> Any:
+    """필터 값 번역/카테고리 확장 (리스트 입력 또는 여러 값으로 펼쳐지면 리스트, 아니면 단일 값 반환)"""
+    dispatch = VALUE_EXPANSION_DISPATCH.get(field)
+    if isinstance(value, list):
+        expanded_list = []
+        for v in value:
+            expanded = dispatch[v] if dispatch and v in dispatch else _expand_translated_value(v)
+            if isinstance(expanded, tuple):
+                expanded_list.extend(expanded)
+            else:
+                expanded_list.append(expanded)
+        return expanded_list
+    expanded = dispatch[value] if dispatch and value in dispatch else _expand_translated_value(value)
+    return list(expanded) if isinstance(expanded, tuple) else expanded
+
 def build_sql_from_structured_filters(filters: List[Dict]) -> Tuple[str, List]:
     """
     JSONB 데이터 타입에 맞춰 정확한 SQL WHERE 절을 생성합니다.
     (소득 범위 스마트 매핑 포함)
+    동일한 필터 조합은 메모이즈된 결과를 재사용합니다.
     """
     if not filters:
         return "", []
 
+    current_year = get_current_year()
+    try:
+        # 조건은 AND로 결합되어 순서가 결과에 영향이 없으므로, 정렬된 키로 정규화해
+        # 순서만 다른 같은 필터 조합도 같은 캐시 항목(및 같은 PREPARE 문)을 공유
+        filters_key = json.dumps(
+            sorted(json.dumps(f, ensure_ascii=False, sort_keys=True) for f in filters), ensure_ascii=False
+        )
+    except (TypeError, ValueError):
+        return _build_sql_uncached(filters, current_year)
+
+    where_clause, params = _build_sql_cached(filters_key, current_year)
+    if next(_build_sql_calls) % BUILD_SQL_CACHE_LOG_INTERVAL == 0:
+        logging.info(f"📊 SQL 빌더 캐시 현황: {_build_sql_cached.cache_info()}")
+    return where_clause, list(params)
+
+
+@lru_cache(maxsize=1024)
+def _build_sql_cached(filters_key: str, current_year: int) -> Tuple[str, Tuple]:
+    # 연도가 바뀌면 나이 -> 출생연도 변환 결과가 달라지므로 키에 포함
+    filters = [json.loads(f) for f in json.loads(filters_key)]
+    where_clause, params = _build_sql_uncached(filters, current_year)
+    return where_clause, tuple(params)
+
+
+def _build_sql_uncached(filters: List[Dict], current_year: int) -> Tuple[str, List]:
     conditions = []
     params = []
-    CURRENT_YEAR = datetime.now().year
-
-    # 소득 카테고리 정의
-    INCOME_RANGES = [
-        (0, 999999, "월 100만원 미만"),
-        (1000000, 1999999, "월 100~199만원"),
-        (2000000, 2999999, "월 200~299만원"),
-        (3000000, 3999999, "월 300~399만원"),
-        (4000000, 4999999, "월 400~499만원"),
-        (5000000, 5999999, "월 500~599만원"),
-        (6000000, 6999999, "월 600~699만원"),
-        (7000000, 999999999, "월 700만원 이상")
-    ]
+    # 문자열 단일 값 일치 조건 (필드 -> 값), 마지막에 하나의 @> 포함 조건으로 합침
+    containment: Dict[str, str] = {}
 
     for f in filters:
         raw_field = f.get("field")
@@ -59,23 +172,12 @@ def build_sql_from_structured_filters(filters: List[Dict]) -> Tuple[str, List]:
         # 1. not_null 처리
         if operator == "not_null":
             base_condition = f"(structured_data->>'{field}' IS NOT NULL AND structured_data->>'{field}' != 'NaN')"
-            exclude_pattern = ""
             
             if field == "children_count":
                 conditions.append(f"({base_condition} AND structured_data->>'{field}' NOT IN ('0', '0명') AND structured_data->>'{field}' !~ '없음')")
                 continue
             
-            if field == "drinking_experience":
-                exclude_pattern = "마시지|않음|없음|비음주|금주|안\\s*마심|전혀"
-            elif field == "smoking_experience":
-                exclude_pattern = "피우지|않음|없음|비흡연|금연|안\\s*피움"
-            elif field == "ott_count":
-                exclude_pattern = "0개|안\\s*함|없음|이용\\s*안|보지\\s*않음"
-            elif field == "fast_delivery_usage":
-                exclude_pattern = "안\\s*함|이용\\s*안|없음|직접\\s*구매"
-            else:
-                exclude_pattern = "없음|비흡연|해당사항|피우지|금연"
-
+            exclude_pattern = NOT_NULL_EXCLUDE_PATTERNS.get(field, DEFAULT_NOT_NULL_EXCLUDE_PATTERN)
             refined_condition = f"({base_condition} AND structured_data->>'{field}' !~ '{exclude_pattern}')"
             conditions.append(refined_condition)
             continue 
@@ -84,66 +186,33 @@ def build_sql_from_structured_filters(filters: List[Dict]) -> Tuple[str, List]:
         if field == "birth_year" or raw_field == "age":
             if operator == "between" and isinstance(value, list) and len(value) == 2:
                 age_start, age_end = value
-                birth_year_end = CURRENT_YEAR - age_start
-                birth_year_start = CURRENT_YEAR - age_end
+                birth_year_end = current_year - age_start
+                birth_year_start = current_year - age_end
                 conditions.append(f"(structured_data->>'birth_year')::int BETWEEN %s AND %s")
                 params.extend([birth_year_start, birth_year_end])
             continue
         
-        # 3. 값 확장 (매핑) - 영어/한글 변환 및 카테고리 확장
-        final_value = value
-        if field in VALUE_TRANSLATION_MAP:
-            mapping = VALUE_TRANSLATION_MAP[field]
-            if isinstance(value, list):
-                converted_list = []
-                for v in value:
-                    mapped_v = mapping.get(v, v)
-                    if isinstance(mapped_v, list):
-                        converted_list.extend(mapped_v)
-                    else:
-                        converted_list.append(mapped_v)
-                final_value = converted_list
-            else:
-                mapped_v = mapping.get(value, value)
-                final_value = mapped_v
-
-        if isinstance(final_value, list):
-            expanded_list = []
-            for v in final_value:
-                if str(v) in CATEGORY_MAPPING:
-                    expanded_list.extend(CATEGORY_MAPPING[str(v)])
-                else:
-                    expanded_list.append(v)
-            final_value = expanded_list
-        elif str(final_value) in CATEGORY_MAPPING:
-            final_value = CATEGORY_MAPPING[str(final_value)]
+        # 3. 값 확장 (매핑) - 영어/한글 변환 및 카테고리 확장 (사전 계산된 조회표 사용)
+        final_value = _expand_filter_value(field, value)
+        # 여러 값이 같은 카테고리로 겹쳐 확장된 경우(예: 'MZ세대' + '청년' -> 20대, 30대) 값마다 한 번씩만 사용
+        if operator == "in" and isinstance(final_value, list):
+            final_value = list(dict.fromkeys(final_value))
 
         # 4. FUZZY_MATCH (ILIKE)
-        if field in FUZZY_MATCH_FIELDS or field in ARRAY_FIELDS:
+        if field in FUZZY_OR_ARRAY_FIELDS:
             if not isinstance(final_value, list):
                 final_value = [final_value]
             
-            or_conditions = []
-            for v in final_value:
-                or_conditions.append(f"structured_data->>'{field}' ILIKE %s")
-                params.append(f"%{v}%")
-            
-            if or_conditions:
-                exclude_sql = ""
-                if field == "drinking_experience":
-                    exclude_patterns = "마시지|않음|없음|비음주|금주|안\\s*마심|전혀"
-                    exclude_sql = f" AND structured_data->>'{field}' !~ '{exclude_patterns}'"
-                elif field == "smoking_experience":
-                    exclude_patterns = "피우지|않음|없음|비흡연|금연|안\\s*피움"
-                    exclude_sql = f" AND structured_data->>'{field}' !~ '{exclude_patterns}'"
-                elif field == "ott_count":
-                    exclude_pattern = "0개|안\\s*함|없음|이용\\s*안|보지\\s*않음"
-                    conditions.append(f"({base_condition} AND structured_data->>'{field}' !~ '{exclude_pattern}')")
-
-                conditions.append(f"({' OR '.join(or_conditions)}){exclude_sql}")
+            # 값마다 ILIKE OR 분기를 만들지 않고 패턴 배열 1개를 ILIKE ANY로 바인딩
+            like_patterns = list(dict.fromkeys(f"%{v}%" for v in final_value))
+            if like_patterns:
+                params.append(like_patterns)
+                exclude_pattern = FUZZY_EXCLUDE_PATTERNS.get(field)
+                exclude_sql = f" AND structured_data->>'{field}' !~ '{exclude_pattern}'" if exclude_pattern else ""
+                conditions.append(f"(structured_data->>'{field}' ILIKE ANY(%s)){exclude_sql}")
 
         # 5. 소득 필드 스마트 처리 (숫자 범위 -> 문자열 카테고리 변환)
-        elif field in ["income_household_monthly", "income_personal_monthly"] and operator in ["gte", "lte", "between"]:
+        elif field in INCOME_FIELDS and operator in RANGE_OPERATORS:
             target_categories = []
             min_val = 0
             max_val = 999999999
@@ -160,9 +229,8 @@ def build_sql_from_structured_filters(filters: List[Dict]) -> Tuple[str, List]:
             
             if target_categories:
                 str_values = [str(v) for v in target_categories]
-                placeholders = ','.join(['%s'] * len(str_values))
-                conditions.append(f"structured_data->>'{field}' IN ({placeholders})")
-                params.extend(str_values)
+                conditions.append(f"structured_data->>'{field}' = ANY(%s)")
+                params.append(str_values)
             else:
                 conditions.append("1=0")
 
@@ -188,29 +256,37 @@ def build_sql_from_structured_filters(filters: List[Dict]) -> Tuple[str, List]:
 
             if field == "family_size":
                 if isinstance(final_value, list):
-                    or_conditions = []
-                    for v in final_value:
-                        or_conditions.append(f"{field_sql} ~ %s")
-                        params.append(f"^{v}([^0-9]|$)") 
-                    conditions.append(f"({' OR '.join(or_conditions)})")
+                    conditions.append(f"{field_sql} ~ ANY(%s)")
+                    params.append([f"^{v}([^0-9]|$)" for v in final_value])
                 else:
                     conditions.append(f"{field_sql} ~ %s")
                     params.append(f"^{final_value}([^0-9]|$)")
 
+            elif (
+                field in CONTAINMENT_EQ_FIELDS and field not in containment
+                and (operator == "eq" and isinstance(final_value, str)
+                     or operator == "in" and isinstance(final_value, list) and len(final_value) == 1 and isinstance(final_value[0], str))
+            ):
+                # 단일 문자열 일치는 모아서 GIN(jsonb_path_ops) 인덱스 1회 탐색으로 처리
+                containment[field] = final_value if isinstance(final_value, str) else final_value[0]
+
             elif operator == "eq":
                 conditions.append(f"{field_sql} = %s")
                 params.append(str(final_value))
 
             elif operator == "in" and isinstance(final_value, list) and final_value:
-                str_values = [str(v) for v in final_value]
-                placeholders = ','.join(['%s'] * len(str_values))
-                conditions.append(f"{field_sql} IN ({placeholders})")
-                params.extend(str_values)
+                # 값 개수와 무관하게 같은 SQL 형태(= ANY 배열 1개)가 되어 준비된 문장도 재사용됨
+                conditions.append(f"{field_sql} = ANY(%s)")
+                params.append([str(v) for v in final_value])
                 
             elif operator == "like":
                 conditions.append(f"{field_sql} ILIKE %s")
                 params.append(f"%{final_value}%")
 
+    if containment:
+        conditions.append("structured_data @> %s::jsonb")
+        params.append(json.dumps(containment, ensure_ascii=False))
+
     if not conditions:
         return "", []
 
@@ -220,95 +296,385 @@ def build_sql_from_structured_filters(filters: List[Dict]) -> Tuple[str, List]:
 
 def search_welcome_objective(
     filters: List[Dict],
-    attempt_name: str = "구조화"
-) -> Tuple[Set[str], Set[str]]:
+    attempt_name: str = "구조화",
+    max_results: Optional[int] = None
+) -> Tuple[Optional[List[str]], Set[str]]:
+    """
+    구조화 필터로 welcome_meta2를 조회
+    - None: 만들 수 있는 WHERE 절이 없어 SQL을 실행하지 않음 (필터 미적용)
+    - 빈 리스트: SQL을 실행했고 조건에 맞는 패널이 없음
+    DB 오류는 PanelQueryError로 그대로 전파됨
+    """
     if not filters:
-        return set(), set()
+        return None, set()
 
     # SQL문 생성 (Logic)
     where_clause, params = build_sql_from_structured_filters(filters)
 
     if not where_clause:
-        return set(), set()
+        return None, set()
 
     # 실행 (Repository)
-    results = PanelRepository.search_panel_ids_by_sql(where_clause, params)
+    results = PanelRepository.search_panel_ids_by_sql(where_clause, params, limit=max_results)
     
     return results, set()
 
-def search_preference_conditions(
-    preference_keywords: List[str],
-    query_vectors: List[List[float]],
-    qdrant_client: QdrantClient,
-    collection_name: str,
-    candidate_panel_ids: Set[str],
-    threshold: float = 0.45,
-    top_k_per_keyword: int = 500
-) -> Tuple[List[tuple], List[str]]:
-    if not preference_keywords or not query_vectors or not candidate_panel_ids:
-        return ([(pid, 0.0) for pid in candidate_panel_ids], [])
-    try:
-        candidate_list = list(candidate_panel_ids)
-        qdrant_filter = Filter(must=[FieldCondition(key="panel_id", match=MatchAny(any=candidate_list))])
-        panel_scores: Dict[str, float] = {pid: 0.0 for pid in candidate_panel_ids}
-        found_categories: List[str] = []
-        for i, (keyword, vector) in enumerate(zip(preference_keywords, query_vectors)):
-            search_results = qdrant_client.search(
-                collection_name=collection_name, query_vector=vector, query_filter=qdrant_filter,
-                limit=top_k_per_keyword, with_payload=True, score_threshold=threshold
-            )
-            for result in search_results:
-                pid = result.payload.get('panel_id')
-                category = result.payload.get('category', None)
-                if not pid and 'metadata' in result.payload:
-                    pid = result.payload['metadata'].get('panel_id')
-                    if not category: category = result.payload['metadata'].get('category', None)
-                if pid and str(pid) in panel_scores:
-                    panel_scores[str(pid)] = max(panel_scores[str(pid)], result.score)
-                    if category: found_categories.append(category)
-        sorted_results = sorted(panel_scores.items(), key=lambda x: x[1], reverse=True)
-        return sorted_results, list(set(found_categories))
-    except Exception as e:
-        logging.error(f"Preference 검색 실패: {e}")
-        return ([(pid, 0.0) for pid in candidate_panel_ids], [])
-
-def filter_negative_conditions(
-    panel_ids: Set[str],
+def find_negative_panel_ids(
+    panel_ids: List[str],
     negative_keywords: List[str],
     query_vectors: List[List[float]],
     qdrant_client: QdrantClient,
     collection_name: str,
-    threshold: float = 0.50
-) -> Set[str]:
-    if not negative_keywords or not query_vectors or not panel_ids: return panel_ids
+    threshold: float = 0.50,
+    id_key_path: str = "panel_id"
+) -> Optional[Set[str]]:
+    """
+    부정 조건에 해당하는 패널 ID만 반환 (후보 전체 집합 복사 없이 호출 측에서 한 번에 걸러내도록)
+    조회 실패 시 None (빈 집합은 '제외 대상 없음'이므로 실패와 구분)
+    """
+    if not negative_keywords or not query_vectors or not panel_ids: return set()
     try:
         panel_ids_to_exclude = set()
-        for vector in query_vectors:
-            search_results = qdrant_client.search(
-                collection_name=collection_name, query_vector=vector, limit=5000,
-                with_payload=True, score_threshold=threshold
-            )
-            for result in search_results:
-                pid = result.payload.get('panel_id')
-                if not pid and 'metadata' in result.payload: pid = result.payload['metadata'].get('panel_id')
-                if pid: panel_ids_to_exclude.add(str(pid))
-        return panel_ids - panel_ids_to_exclude
+        # 부정 키워드 벡터를 (K, D) 행렬로 정규화해 두고, 후보 패널 벡터를 한 번만 가져와
+        # 페이지마다 (N, D) x (D, K) 행렬 곱 1회로 모든 부정 키워드를 동시에 판정
+        neg_matrix = np.asarray(query_vectors, dtype=np.float32)
+        neg_matrix /= np.linalg.norm(neg_matrix, axis=1, keepdims=True) + 1e-12
+        nested_key = id_key_path.split(".", 1)[1] if id_key_path.startswith("metadata.") else None
+
+        # point ID와 panel_id가 달라 has_id를 쓸 수 없으므로, 요청 본문이 커지지 않도록 MatchAny를 청크 단위로 나눠 조회
+        for start in range(0, len(panel_ids), NEGATIVE_FILTER_CHUNK_SIZE):
+            candidate_filter = Filter(must=[
+                FieldCondition(key=id_key_path, match=MatchAny(any=panel_ids[start:start + NEGATIVE_FILTER_CHUNK_SIZE]))
+            ])
+            offset = None
+            while True:
+                points, offset = qdrant_client.scroll(
+                    collection_name=collection_name, scroll_filter=candidate_filter, limit=2000, offset=offset,
+                    with_payload=[id_key_path], with_vectors=True
+                )
+                if points:
+                    matrix = np.asarray([p.vector for p in points], dtype=np.float32)
+                    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+                    is_negative = (matrix @ neg_matrix.T).max(axis=1) >= threshold
+                    # 부정으로 판정된 포인트만 인덱스로 골라 ID를 추출 (전체 포인트 순회 없음)
+                    negative_payloads = [points[i].payload or {} for i in np.flatnonzero(is_negative)]
+                    if nested_key:
+                        pids = [(payload.get('metadata') or {}).get(nested_key) for payload in negative_payloads]
+                    else:
+                        pids = [payload.get(id_key_path) for payload in negative_payloads]
+                    panel_ids_to_exclude.update(str(pid) for pid in pids if pid)
+                if offset is None: break
+        return panel_ids_to_exclude
     except Exception as e:
         logging.error(f"Negative 필터링 실패: {e}")
-        return panel_ids
+        return None
+
+class SearchCoalescer:
+    """
+    동시에 들어온 벡터 검색 요청을 짧은 시간 창(window) 동안 모아 컬렉션별 search_batch 1회로 전송합니다.
+    창을 처음 연 요청(리더)이 대기 후 일괄 전송하고, 나머지 요청은 Future로 결과를 받습니다.
+    같은 컬렉션에 진행 중인 다른 검색이 없으면 모을 요청도 없으므로 대기 없이 바로 전송합니다.
+    """
+
+    def __init__(self, window_sec: float = 0.005, max_batch: int = 32):
+        self.window_sec = window_sec
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[Tuple[SearchRequest, Future]]] = {}
+        # 컬렉션별 진행 중(대기 + 전송 중) 검색 수
+        self._in_flight: Dict[str, int] = defaultdict(int)
+
+    def search(self, qdrant_client: QdrantClient, collection_name: str, request: SearchRequest) -> list:
+        future: Future = Future()
+        ready_batch = None
+        with self._lock:
+            self._in_flight[collection_name] += 1
+            batch = self._pending.setdefault(collection_name, [])
+            batch.append((request, future))
+            is_leader = len(batch) == 1
+            if len(batch) >= self.max_batch or (is_leader and self._in_flight[collection_name] == 1):
+                ready_batch = self._pending.pop(collection_name)
+
+        try:
+            if ready_batch is None and is_leader:
+                time.sleep(self.window_sec)
+                with self._lock:
+                    # 대기 중 배치가 가득 차 이미 전송되었다면 그대로 결과만 기다림
+                    if self._pending.get(collection_name) is batch:
+                        ready_batch = self._pending.pop(collection_name)
+
+            if ready_batch is not None:
+                self._execute(qdrant_client, collection_name, ready_batch)
+            return future.result()
+        finally:
+            with self._lock:
+                self._in_flight[collection_name] -= 1
+
+    def _reset_after_fork(self):
+        # 부모의 대기 중 요청(Future)과 락 상태는 자식 프로세스에서 의미가 없으므로 새로 시작
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._in_flight = defaultdict(int)
+
+    @staticmethod
+    def _execute(qdrant_client: QdrantClient, collection_name: str, batch: List[Tuple[SearchRequest, Future]]):
+        try:
+            results = qdrant_client.search_batch(
+                collection_name=collection_name, requests=[request for request, _ in batch]
+            )
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+search_coalescer = SearchCoalescer()
+
+# 의미 기반 결과 캐시 유효 시간 (데이터 적재 후 오래된 결과가 남지 않도록 짧게 유지)
+SEMANTIC_CACHE_TTL_SEC = float(os.getenv("SEMANTIC_CACHE_TTL_SEC", "300"))
+
+class SemanticResultCache:
+    """
+    의미 기반(near-match) 검색 결과 캐시.
+    같은 검색 조건(context)에서 이전 쿼리 벡터와 코사인 유사도가 threshold 이상이면 저장된 결과를 재사용합니다.
+    """
+
+    def __init__(self, threshold: float = 0.97, max_entries: int = 1000, max_contexts: int = 256, ttl_sec: float = SEMANTIC_CACHE_TTL_SEC):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_contexts = max_contexts
+        self.ttl_sec = ttl_sec
+        self._lock = threading.Lock()
+        # context -> (정규화된 쿼리 행렬(fp32), 결과 리스트, 저장 시각 리스트)
+        # 조회마다 형 변환 복사가 생기지 않도록 fp32 그대로 저장 (행 수가 max_entries로 제한되어 메모리 부담 작음)
+        self._groups: "OrderedDict[tuple, Tuple[np.ndarray, List[Tuple[str, ...]], List[float]]]" = OrderedDict()
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32)
+        return vec / (np.linalg.norm(vec) + 1e-12)
+
+    def get(self, context: tuple, query_vector: List[float]) -> Optional[Tuple[str, ...]]:
+        with self._lock:
+            group = self._groups.get(context)
+            if group is None:
+                return None
+            matrix, results, stored_at = group
+            sims = matrix @ self._normalize(query_vector)
+            best = int(np.argmax(sims))
+            if sims[best] < self.threshold or time.time() - stored_at[best] > self.ttl_sec:
+                return None
+            self._groups.move_to_end(context)
+            return results[best]
+
+    def put(self, context: tuple, query_vector: List[float], result_ids: List[str]):
+        row = self._normalize(query_vector)[np.newaxis, :]
+        with self._lock:
+            group = self._groups.pop(context, None)
+            if group is None:
+                matrix, results, stored_at = row, [], []
+            else:
+                matrix, results, stored_at = group
+                matrix = np.vstack([matrix, row])
+            results.append(tuple(result_ids))
+            stored_at.append(time.time())
+
+            # 가장 오래된 항목부터 제거
+            overflow = len(results) - self.max_entries
+            if overflow > 0:
+                matrix, results, stored_at = matrix[overflow:], results[overflow:], stored_at[overflow:]
+
+            self._groups[context] = (matrix, results, stored_at)
+            while len(self._groups) > self.max_contexts:
+                self._groups.popitem(last=False)
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._groups = OrderedDict()
+
+semantic_result_cache = SemanticResultCache()
+
+EMBEDDING_MODEL_NAME = "nlpai-lab/KURE-v1"
+# 한 번의 forward에 넣을 문장 수 (SentenceTransformer.encode batch_size)
+EMBEDDING_BATCH_SIZE = 32
+# CPU 추론 정밀도: int8이면 Linear 층을 동적 INT8 양자화 (fp32가 기본값, 실패 시 fp32로 동작)
+EMBEDDING_PRECISION = os.getenv("EMBED_PRECISION", "fp32").lower()
+# 임베딩 캐시 키에 쓰는 모델 식별자 (정밀도가 다르면 벡터가 달라지므로 캐시를 분리)
+EMBEDDING_CACHE_MODEL_ID = EMBEDDING_MODEL_NAME if EMBEDDING_PRECISION != "int8" else f"{EMBEDDING_MODEL_NAME}:int8"
+
+_embeddings = None
+_embeddings_lock = threading.Lock()
 
-@lru_cache(maxsize=None)
 def initialize_embeddings():
+    """임베딩 모델 싱글톤 (동시 첫 호출 시에도 모델을 한 번만 로드)"""
+    global _embeddings
+    if _embeddings is None:
+        with _embeddings_lock:
+            if _embeddings is None:
+                try:
+                    model = SentenceTransformer(EMBEDDING_MODEL_NAME, device='cpu')
+                    if EMBEDDING_PRECISION == "int8":
+                        _quantize_embedding_model(model)
+                    _embeddings = model
+                except Exception as e:
+                    logging.error(f"임베딩 로드 실패: {e}")
+                    raise
+    return _embeddings
+
+def _quantize_embedding_model(model: SentenceTransformer):
+    """트랜스포머 본체의 Linear 층을 동적 INT8 양자화 (CPU VNNI/AVX2 int8 연산 사용)"""
+    try:
+        transformer = model[0]
+        transformer.auto_model = torch.quantization.quantize_dynamic(
+            transformer.auto_model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        logging.info("임베딩 모델 INT8 동적 양자화 적용")
+    except Exception as e:
+        logging.warning(f"임베딩 모델 INT8 양자화 실패, fp32로 사용: {e}")
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """텍스트 목록을 배치 단위로 임베딩하여 (N, dim) float32 행렬로 반환 (LangChain 래퍼 없이 모델 직접 호출)"""
+    # 기존 HuggingFaceEmbeddings.embed_documents와 같은 전처리(줄바꿈 -> 공백)로 저장된 벡터와 동일한 결과 유지
+    return initialize_embeddings().encode(
+        [text.replace("\n", " ") for text in texts],
+        batch_size=EMBEDDING_BATCH_SIZE,
+        convert_to_numpy=True,
+        show_progress_bar=False
+    )
+
+# 텍스트별 임베딩 캐시 (LRU, 반복되는 의도/키워드의 모델 호출 제거)
+EMBEDDING_CACHE_SIZE = 2048
+_embedding_cache: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+_embedding_cache_stats = {"hits": 0, "misses": 0}
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# 프로세스 재시작 후에도 유지되는 디스크 캐시 (SQLite, fp16 저장). 경로 미설정 시 비활성화
+EMBEDDING_DISK_CACHE_PATH = os.getenv("EMBEDDING_DISK_CACHE_PATH", "")
+_disk_cache_conn: Optional[sqlite3.Connection] = None
+_disk_cache_lock = threading.Lock()
+
+def _get_disk_cache() -> Optional[sqlite3.Connection]:
+    global _disk_cache_conn
+    if not EMBEDDING_DISK_CACHE_PATH:
+        return None
+    if _disk_cache_conn is None:
+        with _disk_cache_lock:
+            if _disk_cache_conn is None:
+                try:
+                    conn = sqlite3.connect(EMBEDDING_DISK_CACHE_PATH, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("CREATE TABLE IF NOT EXISTS embedding_cache (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+                    conn.commit()
+                    _disk_cache_conn = conn
+                    logging.info(f"임베딩 디스크 캐시 사용: {EMBEDDING_DISK_CACHE_PATH}")
+                except Exception as e:
+                    logging.error(f"임베딩 디스크 캐시 초기화 실패: {e}")
+                    return None
+    return _disk_cache_conn
+
+def _reset_caches_after_fork():
+    """
+    fork된 자식 프로세스가 부모의 SQLite 연결/락을 공유하지 않도록 프로세스 단위 상태를 비웁니다.
+    (임베딩 모델 자체는 읽기 전용이므로 그대로 재사용)
+    """
+    global _disk_cache_conn, _disk_cache_lock, _embeddings_lock, _embedding_cache, _embedding_cache_stats
+
+    _disk_cache_conn = None
+    _disk_cache_lock = threading.Lock()
+    _embeddings_lock = threading.Lock()
+    _embedding_cache = OrderedDict()
+    _embedding_cache_stats = {"hits": 0, "misses": 0}
+    search_coalescer._reset_after_fork()
+    semantic_result_cache._reset_after_fork()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_caches_after_fork)
+
+def _disk_cache_key(text: str) -> str:
+    # 모델명을 키에 포함하여 임베딩 모델 변경 시 자동으로 무효화
+    return hashlib.sha256(f"{EMBEDDING_CACHE_MODEL_ID}:{text}".encode("utf-8")).hexdigest()
+
+def _disk_cache_get_many(texts: List[str]) -> Dict[str, Tuple[float, ...]]:
+    conn = _get_disk_cache()
+    if conn is None or not texts:
+        return {}
+    hashed = {_disk_cache_key(text): text for text in texts}
+    try:
+        with _disk_cache_lock:
+            placeholders = ",".join("?" * len(hashed))
+            rows = conn.execute(
+                f"SELECT key, vector FROM embedding_cache WHERE key IN ({placeholders})", list(hashed)
+            ).fetchall()
+        return {
+            hashed[key]: tuple(np.frombuffer(blob, dtype=np.float16).astype(np.float32).tolist())
+            for key, blob in rows
+        }
+    except Exception as e:
+        logging.warning(f"임베딩 디스크 캐시 조회 실패: {e}")
+        return {}
+
+def _disk_cache_put_many(items: Dict[str, Tuple[float, ...]]):
+    conn = _get_disk_cache()
+    if conn is None or not items:
+        return
     try:
-        return HuggingFaceEmbeddings(model_name="nlpai-lab/KURE-v1", model_kwargs={'device': 'cpu'})
+        rows = [
+            (_disk_cache_key(text), np.asarray(vec, dtype=np.float16).tobytes())
+            for text, vec in items.items()
+        ]
+        with _disk_cache_lock:
+            conn.executemany("INSERT OR REPLACE INTO embedding_cache (key, vector) VALUES (?, ?)", rows)
+            conn.commit()
     except Exception as e:
-        logging.error(f"임베딩 로드 실패: {e}")
-        raise
+        logging.warning(f"임베딩 디스크 캐시 저장 실패: {e}")
+
+def _normalize_embedding_key(text: str) -> str:
+    """공백 차이만 있는 텍스트가 같은 캐시 슬롯을 쓰도록 정규화 ("서울  30대 " -> "서울 30대")"""
+    return _WHITESPACE_RE.sub(" ", text).strip()
 
 def embed_keywords(keywords: List[str]) -> List[List[float]]:
     if not keywords: return []
     try:
-        return initialize_embeddings().embed_documents(keywords)
+        keys = [_normalize_embedding_key(kw) for kw in keywords]
+        found: Dict[str, Tuple[float, ...]] = {}
+        # 캐시 조회/갱신은 GIL 하에서 원자적인 OrderedDict 단일 연산만 사용 (전역 락 없이 동시 요청 병렬 처리)
+        for key in keys:
+            vec = _embedding_cache.get(key)
+            if vec is not None:
+                found[key] = vec
+                try:
+                    _embedding_cache.move_to_end(key)
+                except KeyError:
+                    pass
+
+        # 메모리 캐시에 없는 텍스트는 디스크 캐시 확인 후, 그래도 없으면 한 번의 배치로 임베딩
+        misses = [key for key in dict.fromkeys(keys) if key not in found]
+        if misses:
+            loaded = _disk_cache_get_many(misses)
+            computed = {}
+            to_embed = [key for key in misses if key not in loaded]
+            if to_embed:
+                vectors = embed_texts(to_embed)
+                computed = {key: tuple(vec.tolist()) for key, vec in zip(to_embed, vectors)}
+                _disk_cache_put_many(computed)
+
+            for key in misses:
+                found[key] = _embedding_cache[key] = loaded.get(key) or computed[key]
+            while len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+                try:
+                    _embedding_cache.popitem(last=False)
+                except KeyError:
+                    break
+
+        _embedding_cache_stats["hits"] += len(keys) - len(misses)
+        _embedding_cache_stats["misses"] += len(misses)
+        logging.info(
+            f"🧠 임베딩 캐시: 이번 요청 {len(keys) - len(misses)}/{len(keys)} 적중 "
+            f"(누적 hit {_embedding_cache_stats['hits']}, miss {_embedding_cache_stats['misses']}, size {len(_embedding_cache)})"
+        )
+
+        return [list(found[key]) for key in keys]
     except Exception as e:
         logging.error(f"임베딩 실패: {e}")
         return []
\ No newline at end of file
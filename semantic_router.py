@@ -1,10 +1,10 @@
 import logging
 import numpy as np
 import os
-from typing import List, Dict
-from sklearn.metrics.pairwise import cosine_similarity
+from typing import List, Dict, Optional, Tuple
+from functools import lru_cache
 from utils import QPOLL_FIELDS, WELCOME_OBJECTIVE_FIELDS, FIELD_NAME_MAP
-from search_helpers import initialize_embeddings
+from search_helpers import embed_texts, embed_keywords
 from mapping_rules import get_field_mapping
 
 # 로거 설정
@@ -24,7 +24,6 @@ class SemanticRouter:
             return
             
         logger.info("🔄 Semantic Router 초기화 중...")
-        self.embeddings = initialize_embeddings()
         
         # 2. 질문(Field) 리스트업 (utils.py 활용)
         self.fields = []
@@ -38,17 +37,28 @@ class SemanticRouter:
             self.descriptions.append(desc)
             
         # 3. 모든 필드 미리 벡터화 (캐싱)
-        self.field_vectors = self.embeddings.embed_documents(self.descriptions)
+        self.field_vectors = embed_texts(self.descriptions)
+        # 코사인 유사도를 행렬-벡터 곱 1회로 계산하도록 미리 L2 정규화
+        field_matrix = np.asarray(self.field_vectors, dtype=np.float32)
+        self.field_matrix = field_matrix / (np.linalg.norm(field_matrix, axis=1, keepdims=True) + 1e-12)
         self.initialized = True
         logger.info(f"✅ 총 {len(self.fields)}개 필드(Q-Poll + Welcome) 벡터화 완료")
 
-    def find_closest_field(self, user_intent: str, threshold: float = 0.4) -> Dict:
+    def find_closest_field(self, user_intent: str, threshold: float = 0.4) -> Optional[Dict]:
         """
         사용자 의도(user_intent)와 가장 가까운 질문 필드를 찾습니다.
         1차: 키워드 매칭, 2차: 의미(벡터) 매칭
+        매칭 성공 결과만 캐시하며, 호출 측이 수정해도 캐시가 오염되지 않도록 매번 새 dict를 반환
         """
         if not user_intent:
             return None
+        try:
+            field, description, score, method = _find_closest_field_cached(user_intent, threshold)
+        except LookupError:
+            return None
+        return {"field": field, "description": description, "score": score, "method": method}
+
+    def _match_field(self, user_intent: str, threshold: float) -> Optional[Dict]:
 
         logger.debug(f"➡️ Semantic Router: 의도 '{user_intent}'에 대한 필드 탐색 시작")
 
@@ -67,11 +77,15 @@ class SemanticRouter:
         # 2. 의미 기반 검색 (Fallback)
         logger.debug(f"  (1/2) ⚠️ 키워드 매칭 실패. 의미 기반 검색으로 전환합니다: '{user_intent}'")
         
-        # 사용자 의도 벡터화
-        query_vec = self.embeddings.embed_query(user_intent)
+        # 사용자 의도 벡터화 (공용 임베딩 캐시 경유 -> 이후 hybrid_search의 [의도+부정 키워드] 배치에서 재사용)
+        intent_vectors = embed_keywords([user_intent])
+        if not intent_vectors:
+            return None
+        query_vec = np.asarray(intent_vectors[0], dtype=np.float32)
+        query_vec /= np.linalg.norm(query_vec) + 1e-12
         
-        # 코사인 유사도 계산
-        sims = cosine_similarity([query_vec], self.field_vectors)[0]
+        # 코사인 유사도 계산 (정규화된 필드 행렬 x 정규화된 쿼리)
+        sims = self.field_matrix @ query_vec
         
         # 상위 3개 점수 로깅
         top_k_indices = np.argsort(sims)[-3:][::-1]
@@ -99,4 +113,16 @@ class SemanticRouter:
         }
 
 # 싱글톤 인스턴스 생성
-router = SemanticRouter()
\ No newline at end of file
+router = SemanticRouter()
+
+
+@lru_cache(maxsize=1024)
+def _find_closest_field_cached(user_intent: str, threshold: float) -> Tuple[str, str, float, str]:
+    """
+    의도별 라우팅 결과 캐시 (불변 튜플로 저장)
+    매칭 실패(임베딩 오류 포함)는 LookupError로 알려 lru_cache에 저장되지 않게 함
+    """
+    match = router._match_field(user_intent, threshold)
+    if match is None:
+        raise LookupError(user_intent)
+    return match["field"], match["description"], match["score"], match["method"]
\ No newline at end of file
@@ -1,6 +1,5 @@
 # services.py
 import logging
-import re
 import asyncio
 import time
 from typing import List, Dict, Any, Tuple, Optional
@@ -10,22 +9,20 @@ from repository import PanelRepository, VectorRepository
 from insights import (
     get_ai_summary, 
     analyze_search_results_optimized as analyze_search_results,
-    get_search_result_overview
+    get_search_result_overview,
+    PARENTHESIZED_RE
 )
 from llm import parse_query_intelligent
 from search_helpers import initialize_embeddings
 from search import hybrid_search
 from mapping_rules import (
-    QPOLL_FIELD_TO_TEXT, 
-    QPOLL_ANSWER_TEMPLATES, 
+    QPOLL_FIELD_TO_TEXT,
+    QPOLL_TEXT_TO_FIELD,
+    QPOLL_ANSWER_PATTERNS,
+    QPOLL_CORE_VALUE_PATTERNS,
     VECTOR_CATEGORY_TO_FIELD,
     find_related_fields
 )
-from db import (
-    get_db_connection_context,
-    get_qdrant_client
-)
-from qdrant_client.http.models import Filter, FieldCondition, MatchValue, MatchAny
 from utils import FIELD_NAME_MAP
 
 # --- Helper Functions (유틸리티 함수) ---
@@ -41,31 +38,20 @@ def truncate_text(value: Any, max_length: int = 30) -> str:
 
 def extract_answer_from_template(field_name: str, sentence: str) -> str:
     if not sentence: return ""
-    if field_name == "ott_count":
-        match = re.search(r'(\d+개|이용 안 함|없음)', sentence)
-        if match: return match.group(1)
-    elif field_name == "skincare_spending":
-        match = re.search(r'(\d+만\s*원|\d+~\d+만\s*원|\d+원)', sentence)
+    core_pattern = QPOLL_CORE_VALUE_PATTERNS.get(field_name)
+    if core_pattern:
+        match = core_pattern.search(sentence)
         if match: return match.group(1)
 
-    template = QPOLL_ANSWER_TEMPLATES.get(field_name)
-    if template:
-        try:
-            pattern_str = re.escape(template)
-            pattern_str = pattern_str.replace(re.escape("{answer_str}"), r"(.*?)")
-            pattern_str = pattern_str.replace(r"\(이\)다", r"(?:이)?다")
-            pattern_str = pattern_str.replace(r"\(으\)로", r"(?:으)?로")
-            pattern_str = pattern_str.replace(r"\(가\)", r"(?:가)?")
-            pattern_str = pattern_str.replace(r"\ ", r"\s*")
-
-            match = re.search(pattern_str, sentence)
-            if match:
-                extracted = match.group(1)
-                cleaned = re.sub(r'\([^)]*\)', '', extracted).strip()
-                return truncate_text(cleaned, 20)
-        except: pass
-
-    cleaned = re.sub(r'\([^)]*\)', '', str(sentence)).strip()
+    pattern = QPOLL_ANSWER_PATTERNS.get(field_name)
+    if pattern:
+        match = pattern.search(sentence)
+        if match:
+            extracted = match.group(1)
+            cleaned = PARENTHESIZED_RE.sub('', extracted).strip()
+            return truncate_text(cleaned, 20)
+
+    cleaned = PARENTHESIZED_RE.sub('', str(sentence)).strip()
     return truncate_text(cleaned, 30)
 
 def custom_key_builder(func, namespace: str = "", *, request: Request = None, response: Response = None, **kwargs):
@@ -158,11 +144,12 @@ async def _get_ordered_welcome_data(ids_to_fetch: List[str], fields_to_fetch: Li
     table_data = []
     
     # Repository 호출
-    results = await asyncio.to_thread(PanelRepository.fetch_ordered_table_data, ids_to_fetch)
+    # 표시할 필드가 정해져 있으면 해당 키만 DB에서 잘라 받음
+    results = await asyncio.to_thread(PanelRepository.fetch_ordered_table_data, ids_to_fetch, fields_to_fetch)
 
     for row in results:
         panel_id_val, structured_data_val = row
-        if not structured_data_val: continue
+        if structured_data_val is None: continue
         
         display_data = {'panel_id': panel_id_val}
         if fields_to_fetch:
@@ -183,25 +170,53 @@ async def _get_qpoll_responses_for_table(ids_to_fetch: List[str], qpoll_fields:
     questions_to_fetch = [QPOLL_FIELD_TO_TEXT[f] for f in qpoll_fields if f in QPOLL_FIELD_TO_TEXT]
     if not questions_to_fetch: return {}
 
-    def process_qpoll():
-        qpoll_results = VectorRepository.fetch_qpoll_responses(ids_to_fetch, questions_to_fetch)
-        
-        result_map = {pid: {} for pid in ids_to_fetch}
-        text_to_field_map = {v: k for k, v in QPOLL_FIELD_TO_TEXT.items()}
-        
-        for point in qpoll_results:
-            pid = point.payload.get("panel_id")
-            question = point.payload.get("question")
-            sentence = point.payload.get("sentence")
-            
-            if pid and question and sentence:
-                field_key = text_to_field_map.get(question)
-                if field_key:
-                    core_value = extract_answer_from_template(field_key, sentence)
-                    result_map[pid][field_key] = core_value
-        return result_map
-        
-    return await asyncio.get_running_loop().run_in_executor(None, process_qpoll)
+    # 네트워크 I/O는 비동기 Qdrant 클라이언트로 직접 await (스레드풀 왕복 없음)
+    qpoll_results = await VectorRepository.fetch_qpoll_responses_async(ids_to_fetch, questions_to_fetch)
+
+    result_map = {pid: {} for pid in ids_to_fetch}
+
+    for point in qpoll_results:
+        pid = point.payload.get("panel_id")
+        question = point.payload.get("question")
+        sentence = point.payload.get("sentence")
+
+        if pid and question and sentence:
+            field_key = QPOLL_TEXT_TO_FIELD.get(question)
+            if field_key and pid in result_map:
+                core_value = extract_answer_from_template(field_key, sentence)
+                result_map[pid][field_key] = core_value
+    return result_map
+
+def _is_empty_cell(val: Any) -> bool:
+    return not val or str(val).strip().lower() == 'nan'
+
+def _build_table_rows(
+    welcome_table_data: List[dict],
+    qpoll_responses_map: Dict[str, Dict[str, str]],
+    welcome_fields: List[str],
+    qpoll_fields: List[str],
+    target_field: Optional[str],
+    limit: int
+) -> List[dict]:
+    """Welcome 행에 Q-Poll 응답 병합 + 타겟 값 검증 + 빈 칸 채우기를 한 번의 순회로 처리 (limit개 채우면 중단)"""
+    display_fields = [f for f in welcome_fields + qpoll_fields if f != target_field]
+    check_target = target_field in qpoll_fields or target_field in welcome_fields
+    table_data = []
+
+    for welcome_row in welcome_table_data:
+        if len(table_data) >= limit: break
+        pid = welcome_row.get('panel_id')
+        if pid and pid in qpoll_responses_map:
+            welcome_row.update(qpoll_responses_map[pid])
+
+        if check_target and _is_empty_cell(welcome_row.get(target_field)):
+            continue
+
+        for field in display_fields:
+            if _is_empty_cell(welcome_row.get(field)): welcome_row[field] = "-"
+        table_data.append(welcome_row)
+
+    return table_data
 
 async def _get_welcome_data(panel_id: str) -> Dict:
     result = await asyncio.to_thread(PanelRepository.fetch_panel_detail, panel_id)
@@ -210,19 +225,16 @@ async def _get_welcome_data(panel_id: str) -> Dict:
     return result
 
 async def _get_qpoll_data(panel_id: str) -> Dict:
-    def process():
-        q_data = {"qpoll_응답_개수": 0}
-        res = VectorRepository.fetch_qpoll_for_panel(panel_id)
-        
-        if res:
-            q_data["qpoll_응답_개수"] = len(res)
-            txt_map = {v: k for k, v in QPOLL_FIELD_TO_TEXT.items()}
-            for p in res:
-                if p.payload:
-                    q = p.payload.get("question")
-                    s = p.payload.get("sentence")
-                    if q and s:
-                        k = txt_map.get(q)
-                        if k: q_data[k] = s
-        return q_data
-    return await asyncio.get_running_loop().run_in_executor(None, process)
\ No newline at end of file
+    q_data = {"qpoll_응답_개수": 0}
+    res = await VectorRepository.fetch_qpoll_for_panel_async(panel_id)
+
+    if res:
+        q_data["qpoll_응답_개수"] = len(res)
+        for p in res:
+            if p.payload:
+                q = p.payload.get("question")
+                s = p.payload.get("sentence")
+                if q and s:
+                    k = QPOLL_TEXT_TO_FIELD.get(q)
+                    if k: q_data[k] = s
+    return q_data
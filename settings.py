@@ -55,9 +55,15 @@ class Settings:
     DB_NAME: str = os.environ.get("DB_NAME", "default_db")
     DB_USER: str = os.environ.get("DB_USER", "postgres")
     PORT: int = int(os.environ.get("PORT", 5432))
+    DB_POOL_MIN: int = int(os.environ.get("DB_POOL_MIN", 5))
+    DB_POOL_MAX: int = int(os.environ.get("DB_POOL_MAX", 20))
+    DB_APPLICATION_NAME: str = os.environ.get("DB_APPLICATION_NAME", "jibijoa-backend")
 
     QDRANT_HOST: str = os.environ.get("QDRANT_HOST", "localhost")
     QDRANT_PORT: int = int(os.environ.get("QDRANT_PORT", 6333))
+    # gRPC는 선택 사항 (배포 환경에서 gRPC 포트를 개방한 뒤 QDRANT_PREFER_GRPC=true로 활성화)
+    QDRANT_GRPC_PORT: int = int(os.environ.get("QDRANT_GRPC_PORT", 6334))
+    QDRANT_PREFER_GRPC: bool = os.environ.get("QDRANT_PREFER_GRPC", "false").lower() == "true"
     QDRANT_COLLECTION_WELCOME_NAME: str = os.environ.get("QDRANT_COLLECTION_WELCOME_NAME", "welcome")
     QDRANT_COLLECTION_QPOLL_NAME: str = os.environ.get("QDRANT_COLLECTION_QPOLL_NAME", "qpoll")
 
@@ -2,13 +2,27 @@ import logging
 from collections import Counter
 from typing import List, Dict, Any, Tuple
 import datetime
+import time
 
 from mapping_rules import WELCOME_OBJECTIVE_FIELDS, QPOLL_FIELDS, FIELD_NAME_MAP
 
+# (현재 연도, 다음 해 1월 1일 0시 타임스탬프): 연도가 바뀌기 전까지는 datetime 생성 없이 캐시 값 사용
+_year_cache = (0, 0.0)
+
+def get_current_year() -> int:
+    """현재 연도 (패널마다 datetime.now()를 호출하지 않도록 연말까지 캐시, 해가 바뀌면 자동 갱신)"""
+    global _year_cache
+    year, next_year_start = _year_cache
+    if time.time() < next_year_start:
+        return year
+    now = datetime.datetime.now()
+    _year_cache = (now.year, datetime.datetime(now.year + 1, 1, 1).timestamp())
+    return now.year
+
 def calculate_age_from_birth_year(birth_year, current_year: int = None) -> int:
     """출생연도로부터 나이 계산 (현재 연도 동적 적용)"""
     if current_year is None:
-        current_year = datetime.datetime.now().year
+        current_year = get_current_year()
         
     try:
         return current_year - int(birth_year)
@@ -39,18 +53,3 @@ def find_top_category(distribution: Dict[str, float]) -> Tuple[str, float]:
         return ("없음", 0.0)
     return max(distribution.items(), key=lambda x: x[1])
 
-def extract_field_values(data: List[Dict], field_name: str) -> List[Any]:
-    """데이터에서 특정 필드의 값들을 추출 (analysis.py에서 사용)"""
-    values = []
-
-    if field_name == "birth_year":
-        values = [get_age_group(item.get(field_name, 0)) for item in data if item.get(field_name)]
-    else:
-        raw_values = [item.get(field_name) for item in data if item.get(field_name)]
-        for val in raw_values:
-            if isinstance(val, list):
-                values.extend(val)
-            elif val is not None:
-                values.append(val)
-
-    return [v for v in values if v is not None]